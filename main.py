@@ -32,9 +32,9 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.config_manager import get_config
-from src.coordinator import Coordinator
-from src.node import Node
-from src.gui import SADTFGUI
+
+# Coordinator, Node y SADTFGUI se importan dentro de cada modo de arranque:
+# así --help o un error de argumentos no pagan la carga de tkinter y red.
 
 
 def setup_logging(log_level=logging.INFO):
@@ -50,6 +50,33 @@ def setup_logging(log_level=logging.INFO):
     )
 
 
+def _install_gui_signal_handlers(gui) -> None:
+    """
+    Cierra la GUI de forma ordenada al recibir SIGINT/SIGTERM.
+    
+    Python solo ejecuta los handlers de señales en el hilo principal, y
+    mientras mainloop() espera eventos dentro de Tk no llega a hacerlo.
+    Un after() periódico devuelve el control al intérprete para que la
+    señal se atienda. El handler solo pide a Tk que salga del mainloop;
+    la parada del coordinador/nodo se hace al volver de gui.run(), en el
+    hilo principal, en lugar de llamar a sys.exit() desde un callback.
+    
+    Args:
+        gui: Instancia de SADTFGUI ya creada
+    """
+    def signal_handler(sig, frame):
+        print("\n\n🛑 Señal de interrupción recibida...")
+        gui.root.quit()
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    def wake_interpreter():
+        gui.root.after(500, wake_interpreter)
+    
+    gui.root.after(500, wake_interpreter)
+
+
 def start_coordinador(headless=False):
     """Inicia el sistema como coordinador.
     
@@ -63,12 +90,8 @@ def start_coordinador(headless=False):
     
     config = get_config()
     
-    # Buscar el nodo configurado como coordinador
-    coordinador_node = None
-    for node in config.get_nodes():
-        if node.get('es_coordinador', False):
-            coordinador_node = node
-            break
+    # Nodo configurado como coordinador (precalculado al cargar config)
+    coordinador_node = config.get_coordinator_node()
     
     if not coordinador_node:
         print("❌ ERROR: No hay ningún nodo configurado como coordinador en config.json")
@@ -77,6 +100,8 @@ def start_coordinador(headless=False):
     node_id = coordinador_node['id']
     
     try:
+        from src.coordinator import Coordinator
+        
         # Crear coordinador
         coordinator = Coordinator(node_id)
         
@@ -111,11 +136,14 @@ def start_coordinador(headless=False):
             # Modo normal: con GUI
             print("\n🖥️  Iniciando interfaz gráfica...\n")
             
+            from src.gui import SADTFGUI
+            
             # Callback para obtener nodos activos del coordinador
             def get_active_nodes():
-                return [n.node_id for n in coordinator.nodes.values() if n.activo]
+                return list(coordinator.node_table.active_node_ids())
             
             gui = SADTFGUI(node_id, get_active_nodes, is_coordinator=True)
+            _install_gui_signal_handlers(gui)
             
             # Ejecutar GUI (blocking)
             gui.run()
@@ -152,6 +180,9 @@ def start_nodo(node_id: int):
         return False
     
     try:
+        from src.node import Node
+        from src.gui import SADTFGUI
+        
         # Crear nodo
         node = Node(node_id)
         
@@ -172,13 +203,7 @@ def start_nodo(node_id: int):
         gui = SADTFGUI(node_id, get_active_nodes, is_coordinator=False)
         
         # Manejar señales para cierre limpio
-        def signal_handler(sig, frame):
-            print("\n\n🛑 Señal de interrupción recibida...")
-            node.stop()
-            sys.exit(0)
-        
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        _install_gui_signal_handlers(gui)
         
         # Ejecutar GUI (blocking)
         gui.run()
@@ -202,6 +227,8 @@ def start_gui_only(node_id: int = 1):
     print("="*70 + "\n")
     
     try:
+        from src.gui import SADTFGUI
+        
         # Callback dummy para modo prueba
         def get_active_nodes():
             return [1]  # Solo el nodo actual
@@ -216,8 +243,13 @@ def start_gui_only(node_id: int = 1):
         return False
 
 
-def main():
-    """Función principal."""
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    Construye el parser de argumentos de la línea de comandos.
+    
+    Nota: no se cachea en disco con pickle; ArgumentParser registra una
+    función local que no es serializable y construirlo cuesta < 1 ms.
+    """
     parser = argparse.ArgumentParser(
         description='Sistema de Archivos Distribuido Tolerante a Fallas (SADTF)',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -273,7 +305,52 @@ Ejemplos:
         help='Habilitar modo debug (más logging)'
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+_FLAGS = ('--coordinador', '--headless', '--nodo', '--gui', '--debug')
+
+
+def _fast_parse_args(argv):
+    """
+    Parser mínimo para las invocaciones habituales (flags + --id N).
+    
+    Evita construir el ArgumentParser en el caso común. Ante cualquier
+    cosa que no reconozca (--help, argumentos desconocidos, --id inválido)
+    devuelve None para que argparse genere la ayuda o el error.
+    
+    Args:
+        argv: Argumentos de la línea de comandos (sin el nombre del programa)
+        
+    Returns:
+        argparse.Namespace equivalente al de argparse, o None
+    """
+    values = {flag[2:]: False for flag in _FLAGS}
+    values['id'] = None
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in _FLAGS:
+            values[arg[2:]] = True
+        elif arg == '--id' and i + 1 < len(argv) and argv[i + 1].isdigit():
+            values['id'] = int(argv[i + 1])
+            i += 1
+        elif arg.startswith('--id=') and arg[5:].isdigit():
+            values['id'] = int(arg[5:])
+        else:
+            return None
+        i += 1
+    
+    return argparse.Namespace(**values)
+
+
+def main():
+    """Función principal."""
+    args = _fast_parse_args(sys.argv[1:])
+    if args is None:
+        # Caso poco frecuente (ayuda o error): usar argparse completo
+        args = _build_parser().parse_args()
     
     # Configurar logging
     log_level = logging.DEBUG if args.debug else logging.INFO
@@ -281,7 +358,7 @@ Ejemplos:
     
     # Validar argumentos
     if not (args.coordinador or args.nodo or args.gui):
-        parser.print_help()
+        _build_parser().print_help()
         print("\n❌ ERROR: Debes especificar --coordinador, --nodo, o --gui")
         return 1
     
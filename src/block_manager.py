@@ -14,11 +14,162 @@ Fecha: Noviembre 2025
 """
 
 import hashlib
+import logging
+import mmap
+import multiprocessing
 import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
+
+try:
+    # Opcional: CRC32C acelerado por hardware (instrucción crc32 de SSE4.2)
+    import google_crc32c
+except ImportError:
+    google_crc32c = None
+
+
+# En Windows los descriptores crudos deben abrirse en modo binario
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+# Flags para crear archivos de bloque (O_CLOEXEC solo existe en POSIX)
+_BLOCK_WRITE_FLAGS = (
+    os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY
+    | getattr(os, "O_CLOEXEC", 0)
+)
+
+# Consejos de caché para el kernel (posix_fadvise solo existe en POSIX)
+_FADV_DONTNEED = getattr(os, "POSIX_FADV_DONTNEED", None)
+_FADV_SEQUENTIAL = getattr(os, "POSIX_FADV_SEQUENTIAL", None)
+
+
+def _fadvise(fd: int, advice: Optional[int]) -> None:
+    """
+    Da un consejo de uso de caché al kernel para todo el archivo.
+    
+    Es solo una indicación: si la plataforma o el sistema de archivos no
+    lo soportan, no se hace nada.
+    
+    Args:
+        fd: Descriptor del archivo
+        advice: Constante POSIX_FADV_* (None si no está disponible)
+    """
+    if advice is None:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+
+def _write_all(fd: int, data) -> None:
+    """
+    Escribe todo el buffer en un descriptor, reintentando escrituras parciales.
+    
+    Args:
+        fd: Descriptor de archivo abierto para escritura
+        data: Datos a escribir (cualquier objeto con protocolo buffer)
+    """
+    view = memoryview(data)
+    try:
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        view.release()
+
+
+def _write_block_file(
+    path: str,
+    data,
+    preallocate: bool = False,
+    drop_cache: bool = False
+) -> None:
+    """
+    Crea (o trunca) un archivo de bloque y escribe los datos.
+    
+    Usa os.open/os.write directamente para evitar el BufferedWriter de
+    open(): un bloque se escribe con una sola llamada.
+    
+    Args:
+        path: Ruta del archivo de bloque
+        data: Datos del bloque
+        preallocate: Si True, reserva el espacio antes de escribir
+                     (reduce la fragmentación en ext4/XFS)
+        drop_cache: Si True, indica al kernel que no mantenga el bloque en
+                    la caché de páginas (no se va a releer pronto)
+    """
+    fd = os.open(path, _BLOCK_WRITE_FLAGS, 0o644)
+    try:
+        if preallocate and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, len(data))
+            except OSError:
+                pass  # Sistema de archivos sin soporte, no es crítico
+        _write_all(fd, data)
+        if drop_cache:
+            _fadvise(fd, _FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _copy_fd(in_fd: int, out_fd: int, size: int) -> None:
+    """
+    Copia `size` bytes de un descriptor a otro.
+    
+    Usa os.sendfile (copia dentro del kernel, sin pasar por espacio de
+    usuario) cuando está disponible y shutil.copyfileobj en caso contrario.
+    
+    Args:
+        in_fd: Descriptor de origen (posicionado al inicio)
+        out_fd: Descriptor de destino
+        size: Número de bytes a copiar
+    """
+    if hasattr(os, "sendfile"):
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            # Algunos sistemas no soportan sendfile entre archivos regulares
+            if offset > 0:
+                raise
+    
+    with open(in_fd, 'rb', closefd=False) as src, \
+            open(out_fd, 'wb', closefd=False) as dst:
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+
+
+def _template_hexdigest(template, data) -> str:
+    """
+    Hashea datos partiendo de una copia de un objeto hash en estado inicial.
+    
+    Args:
+        template: Objeto hashlib sin datos
+        data: Datos a hashear
+        
+    Returns:
+        Hash en formato hexadecimal
+    """
+    hash_obj = template.copy()
+    hash_obj.update(data)
+    return hash_obj.hexdigest()
+
+
+def _crc32c_hexdigest(data) -> str:
+    """Calcula el CRC32C de los datos (requiere google-crc32c)."""
+    return format(google_crc32c.value(data), "08x")
 
 
 @dataclass
@@ -31,7 +182,7 @@ class BlockInfo:
         file_name: Nombre del archivo original
         block_index: Índice del bloque dentro del archivo (0, 1, 2, ...)
         size_bytes: Tamaño del bloque en bytes
-        hash: Hash SHA256 del contenido del bloque
+        hash: Hash del contenido del bloque (SHA256 o CRC32C)
     """
     block_id: int
     file_name: str
@@ -48,14 +199,66 @@ class BlockManager:
     y reconstrucción de archivos en bloques.
     """
     
-    def __init__(self, block_size_bytes: int = 1024 * 1024):
+    # Bloques leídos por adelantado (además de los que ya están en proceso)
+    PIPELINE_DEPTH = 4
+    
+    # A partir de cuántos bloques split_file_to_blocks usa procesos. Por
+    # debajo basta el pipeline de hilos (hashlib libera el GIL); un backend
+    # GPU (CUDA) añadiría una dependencia pesada sin mejora medible en este
+    # sistema.
+    PROCESS_POOL_MIN_BLOCKS = 256
+    
+    # Bloques consecutivos que procesa cada tarea del pool de procesos (el
+    # archivo se mapea una vez por tarea, no una vez por bloque)
+    PROCESS_TASK_BLOCKS = 32
+    
+    # Intervalo mínimo entre mensajes de progreso (segundos)
+    PROGRESS_INTERVAL = 0.1
+    
+    def __init__(
+        self,
+        block_size_bytes: int = 1024 * 1024,
+        integrity: str = "sha256"
+    ):
         """
         Inicializa el gestor de bloques.
         
         Args:
             block_size_bytes: Tamaño de cada bloque en bytes (por defecto 1 MB)
+            integrity: Algoritmo para el hash por bloque en split_file_to_blocks
+                       y join_blocks_to_file ("sha256" o "crc32c"). CRC32C
+                       solo detecta corrupción accidental y requiere el
+                       paquete google-crc32c.
+            
+        Raises:
+            ImportError: Si se pide crc32c y google-crc32c no está instalado
         """
+        if integrity == "crc32c" and google_crc32c is None:
+            raise ImportError(
+                "La integridad crc32c requiere el paquete google-crc32c"
+            )
+        
         self.block_size_bytes = block_size_bytes
+        self.integrity = integrity
+        
+        # Objetos hash en estado inicial: cada cálculo parte de un .copy()
+        # en lugar de construir e inicializar un contexto nuevo. hashlib
+        # delega en OpenSSL, que usa las instrucciones SHA-NI del CPU cuando
+        # existen. Algoritmos bloqueados (p. ej. md5 en modo FIPS) se omiten.
+        # Todo se reúne en una tabla algoritmo -> función, así
+        # _calculate_hash resuelve el algoritmo con una sola búsqueda.
+        self._hashers = {}
+        for name in ("sha256", "md5", "sha1"):
+            try:
+                self._hashers[name] = partial(_template_hexdigest, hashlib.new(name))
+            except ValueError:
+                pass
+        if google_crc32c is not None:
+            self._hashers["crc32c"] = _crc32c_hexdigest
+        
+        # Logging (el progreso por bloque se emite con throttling)
+        self.logger = logging.getLogger("BlockManager")
+        self._last_report = 0.0
     
     # ========================================================================
     # Métodos para dividir archivos en bloques
@@ -85,6 +288,33 @@ class BlockManager:
             >>> blocks = bm.split_file_to_blocks("video.mp4", "bloques/")
             >>> print(f"Archivo dividido en {len(blocks)} bloques")
         """
+        return list(self.iter_split_file_to_blocks(file_path, output_dir))
+    
+    def iter_split_file_to_blocks(
+        self,
+        file_path: str,
+        output_dir: str
+    ) -> Iterator[BlockInfo]:
+        """
+        Versión en streaming de split_file_to_blocks.
+        
+        Entrega cada BlockInfo en orden en cuanto su bloque está escrito,
+        sin acumular la lista completa, para que el consumidor pueda
+        empezar a trabajar (p. ej. enviar por red) con el primer bloque.
+        Al ser un generador, los errores (archivo inexistente, E/S) se
+        lanzan al iterar.
+        
+        Args:
+            file_path: Ruta del archivo a dividir
+            output_dir: Directorio donde guardar los bloques
+            
+        Yields:
+            BlockInfo de cada bloque, en orden
+            
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+            IOError: Si hay problemas al leer/escribir
+        """
         file_path = Path(file_path)
         output_dir = Path(output_dir)
         
@@ -106,43 +336,204 @@ class BlockManager:
         print(f"   Tamaño: {file_size:,} bytes ({file_size / (1024*1024):.2f} MB)")
         print(f"   Bloques a crear: {num_blocks}")
         
-        blocks_info = []
+        if num_blocks == 0:
+            print("✅ Archivo vacío, no se crearon bloques\n")
+            return
         
-        # Leer el archivo y dividirlo en bloques
-        with open(file_path, 'rb') as f:
-            for block_index in range(num_blocks):
-                # Leer un bloque de datos
-                block_data = f.read(self.block_size_bytes)
-                
-                # Calcular hash del bloque
-                block_hash = self._calculate_hash(block_data)
-                
-                # Nombre del archivo de bloque: bloque_000.bin, bloque_001.bin, etc.
-                block_filename = f"bloque_{block_index:03d}.bin"
-                block_path = output_dir / block_filename
-                
-                # Guardar el bloque en disco
-                with open(block_path, 'wb') as block_file:
-                    block_file.write(block_data)
-                
-                # Crear información del bloque
-                block_info = BlockInfo(
-                    block_id=block_index,  # Por ahora usamos el índice como ID
-                    file_name=file_name,
-                    block_index=block_index,
-                    size_bytes=len(block_data),
-                    hash=block_hash
-                )
-                
-                blocks_info.append(block_info)
+        # Archivos grandes: repartir los bloques entre procesos para que el
+        # hash no compita por el GIL. Con menos bloques basta el pipeline de
+        # hilos (hashlib ya libera el GIL al calcular el hash).
+        if num_blocks >= self.PROCESS_POOL_MIN_BLOCKS:
+            blocks = self._split_with_processes(
+                file_path, output_dir, file_name, num_blocks
+            )
+        else:
+            blocks = self._split_with_threads(
+                file_path, output_dir, file_name, num_blocks
+            )
+        
+        for done, block_info in enumerate(blocks, 1):
+            self._maybe_report(done, num_blocks)
+            yield block_info
+        
+        print(f"✅ Archivo dividido exitosamente en {num_blocks} bloques\n")
+    
+    def _split_with_threads(
+        self,
+        file_path: Path,
+        output_dir: Path,
+        file_name: str,
+        num_blocks: int
+    ) -> Iterator[BlockInfo]:
+        """
+        Divide un archivo en bloques con un pipeline de hilos.
+        
+        Args:
+            file_path: Ruta del archivo a dividir
+            output_dir: Directorio donde guardar los bloques
+            file_name: Nombre del archivo original
+            num_blocks: Número de bloques a crear
+            
+        Yields:
+            BlockInfo de cada bloque, en orden
+        """
+        # Mapear el archivo en memoria: cada bloque es una vista (memoryview)
+        # sobre el mapeo, sin copiar a un objeto bytes. mmap duplica el
+        # descriptor, así que se puede cerrar enseguida.
+        fd = os.open(str(file_path), os.O_RDONLY | _O_BINARY)
+        try:
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        
+        # Lectura secuencial: permitir al kernel leer por adelantado
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        
+        # Pipeline: un pool de hilos calcula el hash y escribe cada bloque
+        # (hashlib libera el GIL) mientras el hilo principal encola los
+        # siguientes. Los bloques en vuelo están acotados y se recogen en
+        # orden, así el resultado conserva el orden de los bloques.
+        max_workers = max(1, (os.cpu_count() or 2) - 1)
+        max_in_flight = max_workers + self.PIPELINE_DEPTH
+        pending = deque()
+        
+        # Prefijo de ruta precalculado (evita aritmética de Path por bloque)
+        output_prefix = os.path.join(os.fspath(output_dir), "")
+        
+        def collect_next() -> BlockInfo:
+            block_view, future = pending.popleft()
+            try:
+                return future.result()
+            finally:
+                block_view.release()
+        
+        mv = memoryview(mm)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for block_index in range(num_blocks):
+                    start = block_index * self.block_size_bytes
+                    block_view = mv[start:start + self.block_size_bytes]
+                    
+                    pending.append((block_view, pool.submit(
+                        self._process_block,
+                        block_index,
+                        block_view,
+                        file_name,
+                        output_prefix
+                    )))
+                    
+                    if len(pending) >= max_in_flight:
+                        yield collect_next()
                 
-                # Mostrar progreso
-                progress = ((block_index + 1) / num_blocks) * 100
-                print(f"   [{progress:5.1f}%] Bloque {block_index + 1}/{num_blocks} "
-                      f"({len(block_data):,} bytes) → {block_filename}")
+                while pending:
+                    yield collect_next()
+        finally:
+            # Esperar a los bloques en vuelo (si el consumidor abandonó el
+            # generador) y liberar las vistas antes de cerrar el mapeo
+            for block_view, future in pending:
+                future.cancel()
+                wait([future])
+                block_view.release()
+            mv.release()
+            mm.close()
+    
+    def _split_with_processes(
+        self,
+        file_path: Path,
+        output_dir: Path,
+        file_name: str,
+        num_blocks: int
+    ) -> Iterator[BlockInfo]:
+        """
+        Divide un archivo en bloques repartiéndolos entre procesos.
+        
+        Cada tarea toma PROCESS_TASK_BLOCKS bloques consecutivos: el proceso
+        mapea el archivo una vez y procesa esos bloques completos (hash +
+        escritura); los archivos de salida son disjuntos, así que no hay
+        contención entre procesos. El pool es persistente (ver
+        _get_split_process_pool).
+        
+        Args:
+            file_path: Ruta del archivo a dividir
+            output_dir: Directorio donde guardar los bloques
+            file_name: Nombre del archivo original
+            num_blocks: Número de bloques a crear
+            
+        Yields:
+            BlockInfo de cada bloque, en orden
+        """
+        try:
+            pool = _get_split_process_pool()
+        except (OSError, NotImplementedError, ValueError) as e:
+            # Plataformas sin soporte de multiprocessing
+            self.logger.warning(f"Pool de procesos no disponible ({e}), usando hilos")
+            yield from self._split_with_threads(
+                file_path, output_dir, file_name, num_blocks
+            )
+            return
+        
+        output_prefix = os.path.join(os.fspath(output_dir), "")
+        futures = deque(
+            pool.submit(
+                _split_blocks_worker,
+                (self.block_size_bytes, self.integrity, str(file_path),
+                 output_prefix, file_name, first,
+                 min(first + self.PROCESS_TASK_BLOCKS, num_blocks))
+            )
+            for first in range(0, num_blocks, self.PROCESS_TASK_BLOCKS)
+        )
         
-        print(f"✅ Archivo dividido exitosamente en {len(blocks_info)} bloques\n")
-        return blocks_info
+        try:
+            while futures:
+                yield from futures.popleft().result()
+        finally:
+            # El pool sigue vivo: si el consumidor abandonó el generador,
+            # descartar las tareas que no empezaron y esperar las en curso
+            for future in futures:
+                future.cancel()
+            wait(futures)
+    
+    def _process_block(
+        self,
+        block_index: int,
+        block_data,
+        file_name: str,
+        output_prefix: str
+    ) -> BlockInfo:
+        """
+        Calcula el hash de un bloque y lo guarda en disco.
+        Se ejecuta en los hilos de trabajo de split_file_to_blocks.
+        
+        Args:
+            block_index: Índice del bloque dentro del archivo
+            block_data: Datos del bloque (bytes o memoryview)
+            file_name: Nombre del archivo original
+            output_prefix: Directorio de salida terminado en separador
+            
+        Returns:
+            BlockInfo del bloque procesado
+        """
+        # Calcular hash del bloque
+        block_hash = self._calculate_hash(block_data, self.integrity)
+        
+        # Nombre del archivo de bloque: bloque_000.bin, bloque_001.bin, etc.
+        block_path = f"{output_prefix}bloque_{block_index:03d}.bin"
+        
+        # Guardar el bloque en disco (bloques completos se prealojan)
+        _write_block_file(
+            block_path,
+            block_data,
+            preallocate=len(block_data) == self.block_size_bytes
+        )
+        
+        return BlockInfo(
+            block_id=block_index,  # Por ahora usamos el índice como ID
+            file_name=file_name,
+            block_index=block_index,
+            size_bytes=len(block_data),
+            hash=block_hash
+        )
     
     def split_file_to_memory(self, file_path: str) -> List[Tuple[bytes, str]]:
         """
@@ -155,23 +546,33 @@ class BlockManager:
         Returns:
             Lista de tuplas (datos_bloque, hash_bloque)
         """
+        return list(self.iter_split_file_to_memory(file_path))
+    
+    def iter_split_file_to_memory(self, file_path: str) -> Iterator[Tuple[bytes, str]]:
+        """
+        Versión en streaming de split_file_to_memory.
+        
+        Lee y entrega un bloque cada vez, así enviar un archivo por red
+        solo mantiene en memoria el bloque en curso.
+        
+        Args:
+            file_path: Ruta del archivo a dividir
+            
+        Yields:
+            Tuplas (datos_bloque, hash_bloque), en orden
+        """
         file_path = Path(file_path)
         
         if not file_path.exists():
             raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
         
-        blocks = []
-        
         with open(file_path, 'rb') as f:
             while True:
                 block_data = f.read(self.block_size_bytes)
                 if not block_data:
                     break
                 
-                block_hash = self._calculate_hash(block_data)
-                blocks.append((block_data, block_hash))
-        
-        return blocks
+                yield block_data, self._calculate_hash(block_data)
     
     # ========================================================================
     # Métodos para unir bloques y reconstruir archivos
@@ -200,6 +601,57 @@ class BlockManager:
             >>> bm = BlockManager()
             >>> success = bm.join_blocks_to_file("bloques/", "video_recuperado.mp4", 12)
         """
+        return self._join_blocks(blocks_dir, output_file, num_blocks, verify_hashes)
+    
+    def join_blocks_to_file_with_hash(
+        self,
+        blocks_dir: str,
+        output_file: str,
+        num_blocks: int,
+        verify_hashes: Optional[List[str]] = None,
+        algorithm: str = "sha256"
+    ) -> Optional[str]:
+        """
+        Une bloques y calcula el hash del archivo reconstruido en la misma
+        pasada, sin tener que volver a leerlo después.
+        
+        Args:
+            blocks_dir: Directorio donde están los bloques
+            output_file: Ruta donde guardar el archivo reconstruido
+            num_blocks: Número total de bloques a unir
+            verify_hashes: Lista opcional de hashes para verificar integridad
+            algorithm: Algoritmo del hash del archivo completo
+            
+        Returns:
+            Hash del archivo reconstruido, o None si hubo errores
+            
+        Example:
+            >>> bm = BlockManager()
+            >>> file_hash = bm.join_blocks_to_file_with_hash("bloques/", "video.mp4", 12)
+            >>> bm.verify_file_integrity("video_original.mp4", "video.mp4", file_hash)
+        """
+        file_hasher = hashlib.new(algorithm)
+        if self._join_blocks(
+            blocks_dir, output_file, num_blocks, verify_hashes, file_hasher
+        ):
+            return file_hasher.hexdigest()
+        return None
+    
+    def _join_blocks(
+        self,
+        blocks_dir: str,
+        output_file: str,
+        num_blocks: int,
+        verify_hashes: Optional[List[str]] = None,
+        file_hasher=None
+    ) -> bool:
+        """
+        Implementación de join_blocks_to_file.
+        
+        Si se pasa file_hasher (objeto de hashlib), cada bloque se le
+        entrega conforme se escribe, de modo que al terminar contiene el
+        hash del archivo completo.
+        """
         blocks_dir = Path(blocks_dir)
         output_file = Path(output_file)
         
@@ -210,39 +662,73 @@ class BlockManager:
         # Crear directorio de salida si no existe
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Abrir archivo de salida para escribir
-        with open(output_file, 'wb') as out_f:
+        # Abrir archivo de salida para escribir (descriptor crudo, sin buffer)
+        out_fd = os.open(
+            str(output_file),
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY,
+            0o644
+        )
+        # Prefijo de ruta precalculado (evita aritmética de Path por bloque)
+        blocks_prefix = os.path.join(os.fspath(blocks_dir), "")
+        
+        try:
             for block_index in range(num_blocks):
                 # Nombre del bloque
                 block_filename = f"bloque_{block_index:03d}.bin"
-                block_path = blocks_dir / block_filename
                 
-                # Verificar que el bloque existe
-                if not block_path.exists():
+                # Abrir el bloque (falla si no existe)
+                try:
+                    in_fd = os.open(
+                        blocks_prefix + block_filename,
+                        os.O_RDONLY | _O_BINARY
+                    )
+                except FileNotFoundError:
                     print(f"❌ Error: Bloque {block_filename} no encontrado")
                     return False
                 
-                # Leer el bloque
-                with open(block_path, 'rb') as block_f:
-                    block_data = block_f.read()
-                
-                # Verificar hash si se proporcionó
-                if verify_hashes and block_index < len(verify_hashes):
-                    expected_hash = verify_hashes[block_index]
-                    actual_hash = self._calculate_hash(block_data)
+                try:
+                    block_size = os.fstat(in_fd).st_size
                     
-                    if expected_hash != actual_hash:
-                        print(f"❌ Error: Hash del bloque {block_index} no coincide")
-                        print(f"   Esperado: {expected_hash}")
-                        print(f"   Actual:   {actual_hash}")
-                        return False
-                
-                # Escribir el bloque en el archivo de salida
-                out_f.write(block_data)
+                    verify = verify_hashes and block_index < len(verify_hashes)
+                    
+                    if verify or file_hasher is not None:
+                        # Mapear el bloque en memoria: se hashea y se escribe
+                        # desde el mismo buffer sin crear un objeto bytes
+                        block_data = (
+                            mmap.mmap(in_fd, 0, access=mmap.ACCESS_READ)
+                            if block_size > 0 else b''
+                        )
+                        try:
+                            # Verificar hash si se proporcionó
+                            if verify:
+                                expected_hash = verify_hashes[block_index]
+                                actual_hash = self._calculate_hash(
+                                    block_data, self.integrity
+                                )
+                                
+                                if expected_hash != actual_hash:
+                                    print(f"❌ Error: Hash del bloque {block_index} no coincide")
+                                    print(f"   Esperado: {expected_hash}")
+                                    print(f"   Actual:   {actual_hash}")
+                                    return False
+                            
+                            if file_hasher is not None:
+                                file_hasher.update(block_data)
+                            
+                            # Escribir el bloque en el archivo de salida
+                            _write_all(out_fd, block_data)
+                        finally:
+                            if block_size > 0:
+                                block_data.close()
+                    else:
+                        # Copiar el bloque dentro del kernel
+                        _copy_fd(in_fd, out_fd, block_size)
+                finally:
+                    os.close(in_fd)
                 
-                # Mostrar progreso
-                progress = ((block_index + 1) / num_blocks) * 100
-                print(f"   [{progress:5.1f}%] Bloque {block_index + 1}/{num_blocks}")
+                self._maybe_report(block_index + 1, num_blocks)
+        finally:
+            os.close(out_fd)
         
         # Verificar que el archivo se creó
         if output_file.exists():
@@ -269,6 +755,8 @@ class BlockManager:
             Contenido del bloque en bytes
         """
         with open(block_path, 'rb') as f:
+            # Lectura completa de principio a fin: lectura anticipada amplia
+            _fadvise(f.fileno(), _FADV_SEQUENTIAL)
             return f.read()
     
     def write_block(self, block_path: str, data: bytes) -> None:
@@ -282,8 +770,66 @@ class BlockManager:
         block_path = Path(block_path)
         block_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(block_path, 'wb') as f:
-            f.write(data)
+        # Los bloques recibidos de la red rara vez se releen enseguida: no
+        # se dejan en la caché de páginas desplazando datos más usados
+        _write_block_file(str(block_path), data, drop_cache=True)
+    
+    def write_block_stream(
+        self,
+        block_path: str,
+        chunks: Iterable,
+        expected_hash: str,
+        algorithm: str = "sha256"
+    ) -> Optional[int]:
+        """
+        Escribe un bloque que llega por partes, calculando su hash a la vez.
+        
+        Cada parte se agrega al hash y se escribe a disco en cuanto llega,
+        así que nunca hay más de una parte en memoria. Se escribe en un
+        archivo temporal que solo reemplaza a block_path si el hash
+        coincide; si no coincide o falla la lectura, se elimina.
+        
+        Args:
+            block_path: Ruta donde guardar el bloque
+            chunks: Iterable de buffers (pueden reutilizar la misma memoria
+                    entre iteraciones)
+            expected_hash: Hash esperado en hexadecimal
+            algorithm: Algoritmo de hashlib (sha256, md5, sha1)
+            
+        Returns:
+            Bytes escritos, o None si el hash no coincide
+            
+        Raises:
+            ValueError: Si el algoritmo de hash no está soportado
+        """
+        try:
+            hasher = hashlib.new(algorithm)
+        except ValueError:
+            raise ValueError(f"Algoritmo de hash no soportado: {algorithm}") from None
+        
+        tmp_path = f"{block_path}.tmp"
+        fd = os.open(tmp_path, _BLOCK_WRITE_FLAGS, 0o644)
+        stored = False
+        size = 0
+        try:
+            for chunk in chunks:
+                hasher.update(chunk)
+                _write_all(fd, chunk)
+                size += len(chunk)
+            _fadvise(fd, _FADV_DONTNEED)
+            os.close(fd)
+            fd = -1
+            
+            if hasher.hexdigest() == expected_hash:
+                os.replace(tmp_path, block_path)
+                stored = True
+        finally:
+            if fd >= 0:
+                os.close(fd)
+            if not stored:
+                os.unlink(tmp_path)
+        
+        return size if stored else None
     
     def delete_block(self, block_path: str) -> bool:
         """
@@ -295,11 +841,12 @@ class BlockManager:
         Returns:
             True si se eliminó, False si no existía
         """
-        block_path = Path(block_path)
-        if block_path.exists():
-            block_path.unlink()
-            return True
-        return False
+        # Un solo unlink (sin exists() previo)
+        try:
+            os.unlink(block_path)
+        except FileNotFoundError:
+            return False
+        return True
     
     # ========================================================================
     # Métodos para cálculo de hashes e integridad
@@ -311,19 +858,18 @@ class BlockManager:
         
         Args:
             data: Datos a hashear
-            algorithm: Algoritmo de hash (sha256, md5, sha1)
+            algorithm: Algoritmo de hash (sha256, md5, sha1, crc32c)
             
         Returns:
             Hash en formato hexadecimal
         """
-        if algorithm == "sha256":
-            return hashlib.sha256(data).hexdigest()
-        elif algorithm == "md5":
-            return hashlib.md5(data).hexdigest()
-        elif algorithm == "sha1":
-            return hashlib.sha1(data).hexdigest()
-        else:
-            raise ValueError(f"Algoritmo de hash no soportado: {algorithm}")
+        try:
+            hasher = self._hashers[algorithm]
+        except KeyError:
+            if algorithm == "crc32c":
+                raise ValueError("crc32c requiere el paquete google-crc32c") from None
+            raise ValueError(f"Algoritmo de hash no soportado: {algorithm}") from None
+        return hasher(data)
     
     def calculate_hash(self, file_path: str, algorithm: str = "sha256") -> str:
         """
@@ -351,22 +897,29 @@ class BlockManager:
         Returns:
             Hash del archivo completo
         """
-        hash_obj = hashlib.new(algorithm)
-        
         with open(file_path, 'rb') as f:
-            # Leer el archivo en chunks para no saturar la memoria
+            # Python 3.11+: el bucle de lectura + update se hace en C
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, algorithm).hexdigest()
+            
+            # Versiones anteriores: leer en chunks de 1 MB sobre un buffer
+            # reutilizable para no crear un objeto bytes por chunk
+            hash_obj = hashlib.new(algorithm)
+            buffer = bytearray(1024 * 1024)
+            view = memoryview(buffer)
             while True:
-                chunk = f.read(8192)  # 8 KB por chunk
-                if not chunk:
+                n = f.readinto(buffer)
+                if not n:
                     break
-                hash_obj.update(chunk)
+                hash_obj.update(view[:n])
         
         return hash_obj.hexdigest()
     
     def verify_file_integrity(
         self, 
         original_file: str, 
-        reconstructed_file: str
+        reconstructed_file: str,
+        reconstructed_hash: Optional[str] = None
     ) -> bool:
         """
         Verifica que dos archivos son idénticos comparando sus hashes.
@@ -374,12 +927,19 @@ class BlockManager:
         Args:
             original_file: Ruta del archivo original
             reconstructed_file: Ruta del archivo reconstruido
+            reconstructed_hash: Hash SHA256 ya calculado del archivo
+                                reconstruido (p. ej. por
+                                join_blocks_to_file_with_hash); evita releerlo
             
         Returns:
             True si son idénticos, False si son diferentes
         """
         hash_original = self.calculate_file_hash(original_file)
-        hash_reconstructed = self.calculate_file_hash(reconstructed_file)
+        hash_reconstructed = (
+            reconstructed_hash
+            if reconstructed_hash is not None
+            else self.calculate_file_hash(reconstructed_file)
+        )
         
         print(f"\n🔍 Verificando integridad:")
         print(f"   Hash original:      {hash_original}")
@@ -396,6 +956,24 @@ class BlockManager:
     # Métodos de utilidad
     # ========================================================================
     
+    def _maybe_report(self, done: int, total: int) -> None:
+        """
+        Emite el progreso de una operación por bloques, como mucho una vez
+        cada PROGRESS_INTERVAL segundos (el último bloque siempre se reporta).
+        
+        Args:
+            done: Bloques procesados
+            total: Total de bloques
+        """
+        now = time.monotonic()
+        if done < total and now - self._last_report < self.PROGRESS_INTERVAL:
+            return
+        
+        self._last_report = now
+        self.logger.info(
+            "[%5.1f%%] Bloque %d/%d", done / total * 100, done, total
+        )
+    
     def get_num_blocks_for_file(self, file_path: str) -> int:
         """
         Calcula cuántos bloques se necesitan para un archivo.
@@ -422,6 +1000,85 @@ class BlockManager:
         return f"bloque_{block_index:03d}.bin"
 
 
+# ============================================================================
+# Trabajadores del pool de procesos de split_file_to_blocks
+# ============================================================================
+
+# Pool de procesos compartido por todos los BlockManager del proceso: se
+# crea en el primer uso y se reutiliza, sin pagar el arranque por archivo.
+# Usa forkserver (o spawn): hacer fork de un proceso con hilos (red, GUI)
+# puede dejar locks tomados en el hijo
+_split_process_pool: Optional[ProcessPoolExecutor] = None
+_split_process_pool_lock = threading.Lock()
+
+# BlockManager de cada proceso trabajador, por (tamaño de bloque, integridad)
+_worker_block_managers: Dict[Tuple[int, str], BlockManager] = {}
+
+
+def _get_split_process_pool() -> ProcessPoolExecutor:
+    """
+    Devuelve el pool de procesos de split_file_to_blocks (lo crea si falta).
+    
+    Returns:
+        Pool de procesos persistente
+        
+    Raises:
+        OSError, NotImplementedError, ValueError: Si la plataforma no
+            permite crear procesos
+    """
+    global _split_process_pool
+    with _split_process_pool_lock:
+        if _split_process_pool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+            else:
+                context = multiprocessing.get_context("spawn")
+            _split_process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=context
+            )
+        return _split_process_pool
+
+
+def _split_blocks_worker(task: Tuple[int, str, str, str, str, int, int]) -> List[BlockInfo]:
+    """
+    Procesa un rango de bloques consecutivos en un proceso trabajador.
+    
+    Args:
+        task: Tupla (tamaño_bloque, integridad, ruta_archivo,
+              prefijo_salida, nombre_archivo, primer_bloque, fin_rango)
+        
+    Returns:
+        BlockInfo de cada bloque del rango, en orden
+    """
+    (block_size_bytes, integrity, file_path, output_prefix,
+     file_name, first, end) = task
+    
+    bm = _worker_block_managers.get((block_size_bytes, integrity))
+    if bm is None:
+        bm = BlockManager(block_size_bytes, integrity)
+        _worker_block_managers[(block_size_bytes, integrity)] = bm
+    
+    fd = os.open(file_path, os.O_RDONLY | _O_BINARY)
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    
+    blocks = []
+    try:
+        with memoryview(mm) as mv:
+            for block_index in range(first, end):
+                start = block_index * block_size_bytes
+                with mv[start:start + block_size_bytes] as block_view:
+                    blocks.append(bm._process_block(
+                        block_index, block_view, file_name, output_prefix
+                    ))
+    finally:
+        mm.close()
+    return blocks
+
+
 # ============================================================================
 # Código de prueba
 # ============================================================================
@@ -431,6 +1088,12 @@ if __name__ == "__main__":
     print("  Probando BlockManager")
     print("="*60)
     
+    # Configurar logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     # Crear un archivo de prueba
     test_dir = Path("tests/temp")
     test_dir.mkdir(parents=True, exist_ok=True)
@@ -439,9 +1102,13 @@ if __name__ == "__main__":
     
     # Generar contenido de prueba (3.5 MB)
     print("\n1️⃣ Creando archivo de prueba...")
-    with open(test_file, 'w') as f:
-        for i in range(100000):
-            f.write(f"Esta es la línea {i} del archivo de prueba. " * 3 + "\n")
+    # Se genera todo el contenido en memoria y se escribe de una sola vez
+    # (cada línea lleva su número para que los bloques sean distintos)
+    content = "".join(
+        f"Esta es la línea {i} del archivo de prueba. " * 3 + "\n"
+        for i in range(100000)
+    )
+    test_file.write_bytes(content.encode('utf-8'))
     
     file_size = test_file.stat().st_size
     print(f"   ✓ Archivo creado: {file_size:,} bytes ({file_size / (1024*1024):.2f} MB)")
@@ -460,18 +1127,20 @@ if __name__ == "__main__":
     # Reconstruir archivo
     print("\n3️⃣ Reconstruyendo archivo...")
     reconstructed_file = test_dir / "archivo_reconstruido.txt"
-    success = bm.join_blocks_to_file(
+    reconstructed_hash = bm.join_blocks_to_file_with_hash(
         str(blocks_dir), 
         str(reconstructed_file), 
-        len(blocks_info)
+        len(blocks_info),
+        [block.hash for block in blocks_info]
     )
     
-    # Verificar integridad
-    if success:
+    # Verificar integridad (el hash se calculó al reconstruir)
+    if reconstructed_hash is not None:
         print("4️⃣ Verificando integridad...")
         is_identical = bm.verify_file_integrity(
             str(test_file), 
-            str(reconstructed_file)
+            str(reconstructed_file),
+            reconstructed_hash
         )
         
         if is_identical:
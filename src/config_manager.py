@@ -12,8 +12,39 @@ Fecha: Noviembre 2025
 
 import json
 import os
+import sys
+import threading
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    # Opcional: parser JSON más rápido (acelera reload())
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads_json(data: bytes) -> Any:
+    """
+    Parsea un documento JSON en bytes con orjson si está disponible.
+    
+    Args:
+        data: Contenido JSON codificado en UTF-8
+        
+    Returns:
+        Objeto Python resultante
+        
+    Raises:
+        json.JSONDecodeError: Si el JSON está mal formado (orjson lanza
+                              una subclase de esta excepción)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+# Raíz del proyecto: este archivo está en src/, el config está en config/
+_PROJECT_ROOT = Path(__file__).parent.parent
 
 
 class ConfigManager:
@@ -24,6 +55,9 @@ class ConfigManager:
     para acceder a los diferentes parámetros del sistema.
     """
     
+    # Campos que debe tener cada nodo en config.json
+    _REQUIRED_NODE_KEYS = ("id", "nombre", "ip", "puerto", "capacidad_mb")
+    
     def __init__(self, config_path: Optional[str] = None):
         """
         Inicializa el gestor de configuración.
@@ -33,14 +67,27 @@ class ConfigManager:
                         busca en la ruta por defecto ../config/config.json
         """
         if config_path is None:
-            # Obtener la ruta del directorio del proyecto
-            # Este archivo está en src/, el config está en config/
-            project_root = Path(__file__).parent.parent
-            config_path = project_root / "config" / "config.json"
+            config_path = _PROJECT_ROOT / "config" / "config.json"
         
         self.config_path = Path(config_path)
         self.config: Dict[str, Any] = {}
-        self._load_config()
+        
+        # Nodo coordinador (se calcula una vez al cargar la configuración)
+        self._coordinator_node: Optional[Dict[str, Any]] = None
+        
+        # La carga se hace en el primer acceso a un parámetro: crear el
+        # gestor no lee el disco y los cambios hechos antes de usarlo
+        # quedan reflejados. El lock evita que dos hilos la carguen a la vez.
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def _ensure_loaded(self) -> None:
+        """Carga la configuración si todavía no se ha cargado."""
+        if not self._loaded:
+            # Doble verificación: solo el primer hilo carga la configuración
+            with self._load_lock:
+                if not self._loaded:
+                    self._load_config()
     
     def _load_config(self) -> None:
         """
@@ -49,6 +96,7 @@ class ConfigManager:
         Raises:
             FileNotFoundError: Si el archivo config.json no existe
             json.JSONDecodeError: Si el archivo JSON está mal formado
+            ValueError: Si a algún nodo le faltan campos obligatorios
         """
         if not self.config_path.exists():
             raise FileNotFoundError(
@@ -56,8 +104,7 @@ class ConfigManager:
             )
         
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+            self.config = _loads_json(self.config_path.read_bytes())
             print(f"✓ Configuración cargada desde: {self.config_path}")
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(
@@ -65,13 +112,102 @@ class ConfigManager:
                 e.doc,
                 e.pos
             )
+        
+        self._cache_settings()
+        self._loaded = True
+    
+    def _cache_settings(self) -> None:
+        """
+        Precalcula los parámetros de configuración como atributos.
+        
+        Los getters se llaman en caminos frecuentes (heartbeat, asignación
+        de bloques, handlers de red); así devuelven un atributo en lugar de
+        recorrer self.config en cada llamada. Se ejecuta en cada carga.
+        
+        Raises:
+            ValueError: Si a algún nodo le faltan campos obligatorios
+        """
+        sistema = self.config.get("sistema", {})
+        almacenamiento = self.config.get("almacenamiento", {})
+        red = self.config.get("red", {})
+        replicacion = self.config.get("replicacion", {})
+        seguridad = self.config.get("seguridad", {})
+        gui = self.config.get("gui", {})
+        
+        self._system_name = sistema.get("nombre", "SADTF")
+        self._system_version = sistema.get("version", "1.0.0")
+        
+        self._block_size_mb = almacenamiento.get("tamaño_bloque_mb", 1)
+        self._block_size_bytes = self._block_size_mb * 1024 * 1024
+        self._shared_space_size_mb = almacenamiento.get(
+            "tamaño_espacio_compartido_mb", 70
+        )
+        self._blocks_directory = _PROJECT_ROOT / almacenamiento.get(
+            "directorio_bloques", "espacioCompartido"
+        )
+        self._metadata_directory = _PROJECT_ROOT / almacenamiento.get(
+            "directorio_metadata", "metadata"
+        )
+        self._logs_directory = _PROJECT_ROOT / almacenamiento.get(
+            "directorio_logs", "logs"
+        )
+        
+        self._coordinator_port = red.get("puerto_coordinador", 5000)
+        self._node_port = red.get("puerto_nodo", 5001)
+        self._timeout_seconds = red.get("timeout_segundos", 5)
+        self._heartbeat_interval = red.get("intervalo_heartbeat_segundos", 3)
+        self._wire_compression = red.get("compresion", "raw")
+        
+        self._nodes = self.config.get("nodos", [])
+        
+        # Validar los nodos una vez: el resto del código indexa sus campos
+        # directamente
+        for node in self._nodes:
+            missing = [key for key in self._REQUIRED_NODE_KEYS if key not in node]
+            if missing:
+                raise ValueError(
+                    f"Nodo mal configurado en config.json "
+                    f"(id={node.get('id')}): faltan {', '.join(missing)}"
+                )
+        
+        # Índice por ID (ante IDs repetidos gana el primero, como el recorrido)
+        self._nodes_by_id = {}
+        for node in self._nodes:
+            self._nodes_by_id.setdefault(node.get("id"), node)
+        # Direcciones (ip, puerto) ya extraídas, para los bucles por bloque
+        self._node_addresses = {
+            node_id: (node["ip"], node["puerto"])
+            for node_id, node in self._nodes_by_id.items()
+        }
+        self._total_capacity_mb = sum(
+            node["capacidad_mb"]
+            for node in self._nodes if node.get("activo", False)
+        )
+        self._total_blocks = self._total_capacity_mb // self._block_size_mb
+        self._coordinator_node = next(
+            (node for node in self._nodes if node.get("es_coordinador", False)),
+            None
+        )
+        
+        self._num_replicas = replicacion.get("numero_replicas", 1)
+        self._replication_strategy = replicacion.get("estrategia", "distribuida")
+        
+        self._verify_integrity = seguridad.get("verificar_integridad", True)
+        self._hash_algorithm = seguridad.get("algoritmo_hash", "sha256")
+        
+        self._gui_title = gui.get("titulo", "SADTF")
+        self._gui_width = gui.get("ancho", 900)
+        self._gui_height = gui.get("alto", 500)
+        self._gui_header_color = gui.get("color_header", "#1B5E7E")
+        self._gui_update_interval = gui.get("actualizar_cada_segundos", 2)
     
     def reload(self) -> None:
         """
         Recarga la configuración desde el archivo.
         Útil si el archivo cambia durante la ejecución.
         """
-        self._load_config()
+        with self._load_lock:
+            self._load_config()
     
     # ========================================================================
     # Métodos para acceder a configuración del sistema
@@ -79,11 +215,13 @@ class ConfigManager:
     
     def get_system_name(self) -> str:
         """Retorna el nombre del sistema (SADTF)."""
-        return self.config.get("sistema", {}).get("nombre", "SADTF")
+        self._ensure_loaded()
+        return self._system_name
     
     def get_system_version(self) -> str:
         """Retorna la versión del sistema."""
-        return self.config.get("sistema", {}).get("version", "1.0.0")
+        self._ensure_loaded()
+        return self._system_version
     
     # ========================================================================
     # Métodos para acceder a configuración de almacenamiento
@@ -91,43 +229,35 @@ class ConfigManager:
     
     def get_block_size_mb(self) -> int:
         """Retorna el tamaño de bloque en MB (por defecto 1 MB)."""
-        return self.config.get("almacenamiento", {}).get("tamaño_bloque_mb", 1)
+        self._ensure_loaded()
+        return self._block_size_mb
     
     def get_block_size_bytes(self) -> int:
         """Retorna el tamaño de bloque en bytes."""
-        return self.get_block_size_mb() * 1024 * 1024
+        self._ensure_loaded()
+        return self._block_size_bytes
     
     def get_shared_space_size_mb(self) -> int:
         """Retorna el tamaño del espacio compartido en MB."""
-        return self.config.get("almacenamiento", {}).get(
-            "tamaño_espacio_compartido_mb", 70
-        )
+        self._ensure_loaded()
+        return self._shared_space_size_mb
     
     def get_blocks_directory(self) -> Path:
         """
         Retorna la ruta completa al directorio de bloques (espacioCompartido).
         """
-        project_root = Path(__file__).parent.parent
-        dir_name = self.config.get("almacenamiento", {}).get(
-            "directorio_bloques", "espacioCompartido"
-        )
-        return project_root / dir_name
+        self._ensure_loaded()
+        return self._blocks_directory
     
     def get_metadata_directory(self) -> Path:
         """Retorna la ruta completa al directorio de metadatos."""
-        project_root = Path(__file__).parent.parent
-        dir_name = self.config.get("almacenamiento", {}).get(
-            "directorio_metadata", "metadata"
-        )
-        return project_root / dir_name
+        self._ensure_loaded()
+        return self._metadata_directory
     
     def get_logs_directory(self) -> Path:
         """Retorna la ruta completa al directorio de logs."""
-        project_root = Path(__file__).parent.parent
-        dir_name = self.config.get("almacenamiento", {}).get(
-            "directorio_logs", "logs"
-        )
-        return project_root / dir_name
+        self._ensure_loaded()
+        return self._logs_directory
     
     # ========================================================================
     # Métodos para acceder a configuración de red
@@ -135,19 +265,28 @@ class ConfigManager:
     
     def get_coordinator_port(self) -> int:
         """Retorna el puerto del coordinador."""
-        return self.config.get("red", {}).get("puerto_coordinador", 5000)
+        self._ensure_loaded()
+        return self._coordinator_port
     
     def get_node_port(self) -> int:
         """Retorna el puerto por defecto de los nodos."""
-        return self.config.get("red", {}).get("puerto_nodo", 5001)
+        self._ensure_loaded()
+        return self._node_port
     
     def get_timeout_seconds(self) -> int:
         """Retorna el timeout en segundos para operaciones de red."""
-        return self.config.get("red", {}).get("timeout_segundos", 5)
+        self._ensure_loaded()
+        return self._timeout_seconds
     
     def get_heartbeat_interval(self) -> int:
         """Retorna el intervalo de heartbeat en segundos."""
-        return self.config.get("red", {}).get("intervalo_heartbeat_segundos", 3)
+        self._ensure_loaded()
+        return self._heartbeat_interval
+    
+    def get_wire_compression(self) -> str:
+        """Retorna la compresión de bloques al enviarlos (raw, zlib, lz4)."""
+        self._ensure_loaded()
+        return self._wire_compression
     
     # ========================================================================
     # Métodos para acceder a configuración de nodos
@@ -167,7 +306,8 @@ class ConfigManager:
             - activo: Si está activo inicialmente
             - es_coordinador: Si es el coordinador
         """
-        return self.config.get("nodos", [])
+        self._ensure_loaded()
+        return self._nodes
     
     def get_node_by_id(self, node_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -179,10 +319,21 @@ class ConfigManager:
         Returns:
             Diccionario con la configuración del nodo, o None si no existe
         """
-        for node in self.get_nodes():
-            if node.get("id") == node_id:
-                return node
-        return None
+        self._ensure_loaded()
+        return self._nodes_by_id.get(node_id)
+    
+    def get_node_address(self, node_id: int) -> Optional[Tuple[str, int]]:
+        """
+        Obtiene la dirección de red de un nodo por su ID.
+        
+        Args:
+            node_id: ID del nodo
+            
+        Returns:
+            Tupla (ip, puerto), o None si el nodo no existe
+        """
+        self._ensure_loaded()
+        return self._node_addresses.get(node_id)
     
     def get_coordinator_node(self) -> Optional[Dict[str, Any]]:
         """
@@ -191,10 +342,31 @@ class ConfigManager:
         Returns:
             Diccionario con la configuración del coordinador, o None
         """
-        for node in self.get_nodes():
-            if node.get("es_coordinador", False):
-                return node
-        return None
+        self._ensure_loaded()
+        return self._coordinator_node
+    
+    def get_ring_successors(self, node_id: int) -> List[Dict[str, Any]]:
+        """
+        Retorna los nodos que siguen a node_id en el anillo de heartbeat.
+        
+        El anillo sigue el orden de los nodos en config.json y se cierra
+        al final de la lista. El primero de la lista es el sucesor directo;
+        los demás son los siguientes a probar si el sucesor no responde.
+        
+        Args:
+            node_id: ID del nodo desde el que se recorre el anillo
+            
+        Returns:
+            Lista de nodos en orden de anillo (sin incluir node_id), o una
+            lista vacía si node_id no existe
+        """
+        self._ensure_loaded()
+        ids = [node["id"] for node in self._nodes]
+        if node_id not in ids:
+            return []
+        position = ids.index(node_id)
+        ring = self._nodes[position + 1:] + self._nodes[:position]
+        return [node for node in ring if node["id"] != node_id]
     
     def get_total_capacity_mb(self) -> int:
         """
@@ -203,11 +375,8 @@ class ConfigManager:
         Returns:
             Suma de las capacidades de todos los nodos activos
         """
-        total = 0
-        for node in self.get_nodes():
-            if node.get("activo", False):
-                total += node.get("capacidad_mb", 0)
-        return total
+        self._ensure_loaded()
+        return self._total_capacity_mb
     
     def get_total_blocks(self) -> int:
         """
@@ -216,7 +385,8 @@ class ConfigManager:
         Returns:
             Total de bloques = capacidad_total_mb / tamaño_bloque_mb
         """
-        return self.get_total_capacity_mb() // self.get_block_size_mb()
+        self._ensure_loaded()
+        return self._total_blocks
     
     # ========================================================================
     # Métodos para acceder a configuración de replicación
@@ -227,11 +397,13 @@ class ConfigManager:
         Retorna el número de réplicas por bloque.
         Por defecto 1 (significa 2 copias totales: original + 1 réplica).
         """
-        return self.config.get("replicacion", {}).get("numero_replicas", 1)
+        self._ensure_loaded()
+        return self._num_replicas
     
     def get_replication_strategy(self) -> str:
         """Retorna la estrategia de replicación."""
-        return self.config.get("replicacion", {}).get("estrategia", "distribuida")
+        self._ensure_loaded()
+        return self._replication_strategy
     
     # ========================================================================
     # Métodos para acceder a configuración de seguridad
@@ -239,11 +411,13 @@ class ConfigManager:
     
     def should_verify_integrity(self) -> bool:
         """Retorna si se debe verificar la integridad de los archivos."""
-        return self.config.get("seguridad", {}).get("verificar_integridad", True)
+        self._ensure_loaded()
+        return self._verify_integrity
     
     def get_hash_algorithm(self) -> str:
         """Retorna el algoritmo de hash a usar (sha256, md5, etc.)."""
-        return self.config.get("seguridad", {}).get("algoritmo_hash", "sha256")
+        self._ensure_loaded()
+        return self._hash_algorithm
     
     # ========================================================================
     # Métodos para acceder a configuración de GUI
@@ -251,64 +425,81 @@ class ConfigManager:
     
     def get_gui_title(self) -> str:
         """Retorna el título de la ventana de la GUI."""
-        return self.config.get("gui", {}).get("titulo", "SADTF")
+        self._ensure_loaded()
+        return self._gui_title
     
     def get_gui_width(self) -> int:
         """Retorna el ancho de la ventana de la GUI."""
-        return self.config.get("gui", {}).get("ancho", 900)
+        self._ensure_loaded()
+        return self._gui_width
     
     def get_gui_height(self) -> int:
         """Retorna el alto de la ventana de la GUI."""
-        return self.config.get("gui", {}).get("alto", 500)
+        self._ensure_loaded()
+        return self._gui_height
     
     def get_gui_header_color(self) -> str:
         """Retorna el color del header de la GUI."""
-        return self.config.get("gui", {}).get("color_header", "#1B5E7E")
+        self._ensure_loaded()
+        return self._gui_header_color
     
     def get_gui_update_interval(self) -> int:
         """Retorna el intervalo de actualización de la GUI en segundos."""
-        return self.config.get("gui", {}).get("actualizar_cada_segundos", 2)
+        self._ensure_loaded()
+        return self._gui_update_interval
     
     # ========================================================================
     # Métodos de utilidad
     # ========================================================================
     
-    def print_config_summary(self) -> None:
+    def iter_config_summary_lines(self) -> Iterator[str]:
         """
-        Imprime un resumen de la configuración actual.
-        Útil para debugging y verificación.
+        Genera, línea a línea, el resumen de la configuración actual.
+        
+        Yields:
+            Líneas del resumen (sin salto de línea final)
         """
-        print("\n" + "="*60)
-        print(f"  {self.get_system_name()} v{self.get_system_version()}")
-        print("="*60)
-        print(f"\n📦 ALMACENAMIENTO:")
-        print(f"   Tamaño de bloque: {self.get_block_size_mb()} MB")
-        print(f"   Espacio por nodo: {self.get_shared_space_size_mb()} MB")
-        print(f"   Capacidad total: {self.get_total_capacity_mb()} MB")
-        print(f"   Total de bloques: {self.get_total_blocks()}")
-        
-        print(f"\n🌐 RED:")
-        print(f"   Puerto coordinador: {self.get_coordinator_port()}")
-        print(f"   Timeout: {self.get_timeout_seconds()}s")
-        print(f"   Heartbeat: {self.get_heartbeat_interval()}s")
-        
-        print(f"\n💻 NODOS CONFIGURADOS:")
+        yield ""
+        yield "="*60
+        yield f"  {self.get_system_name()} v{self.get_system_version()}"
+        yield "="*60
+        yield f"\n📦 ALMACENAMIENTO:"
+        yield f"   Tamaño de bloque: {self.get_block_size_mb()} MB"
+        yield f"   Espacio por nodo: {self.get_shared_space_size_mb()} MB"
+        yield f"   Capacidad total: {self.get_total_capacity_mb()} MB"
+        yield f"   Total de bloques: {self.get_total_blocks()}"
+        
+        yield f"\n🌐 RED:"
+        yield f"   Puerto coordinador: {self.get_coordinator_port()}"
+        yield f"   Timeout: {self.get_timeout_seconds()}s"
+        yield f"   Heartbeat: {self.get_heartbeat_interval()}s"
+        yield f"   Compresión: {self.get_wire_compression()}"
+        
+        yield f"\n💻 NODOS CONFIGURADOS:"
         for node in self.get_nodes():
             coord = " [COORDINADOR]" if node.get("es_coordinador") else ""
             estado = "✓" if node.get("activo") else "✗"
-            print(f"   {estado} Nodo {node['id']}: {node['nombre']} "
-                  f"({node['ip']}:{node['puerto']}) - "
-                  f"{node['capacidad_mb']} MB{coord}")
+            yield (f"   {estado} Nodo {node['id']}: {node['nombre']} "
+                   f"({node['ip']}:{node['puerto']}) - "
+                   f"{node['capacidad_mb']} MB{coord}")
         
-        print(f"\n🔄 REPLICACIÓN:")
-        print(f"   Réplicas por bloque: {self.get_num_replicas()}")
-        print(f"   Estrategia: {self.get_replication_strategy()}")
+        yield f"\n🔄 REPLICACIÓN:"
+        yield f"   Réplicas por bloque: {self.get_num_replicas()}"
+        yield f"   Estrategia: {self.get_replication_strategy()}"
         
-        print(f"\n🔒 SEGURIDAD:")
-        print(f"   Verificar integridad: {self.should_verify_integrity()}")
-        print(f"   Algoritmo hash: {self.get_hash_algorithm()}")
+        yield f"\n🔒 SEGURIDAD:"
+        yield f"   Verificar integridad: {self.should_verify_integrity()}"
+        yield f"   Algoritmo hash: {self.get_hash_algorithm()}"
         
-        print("\n" + "="*60 + "\n")
+        yield "\n" + "="*60 + "\n"
+    
+    def print_config_summary(self) -> None:
+        """
+        Imprime un resumen de la configuración actual.
+        Útil para debugging y verificación.
+        """
+        # Se escribe con una sola llamada
+        sys.stdout.write("\n".join(self.iter_config_summary_lines()) + "\n")
 
 
 # ============================================================================
@@ -316,6 +507,7 @@ class ConfigManager:
 # ============================================================================
 
 _config_manager_instance = None
+_config_manager_lock = threading.Lock()
 
 
 def get_config() -> ConfigManager:
@@ -334,9 +526,15 @@ def get_config() -> ConfigManager:
         >>> block_size = config.get_block_size_mb()
     """
     global _config_manager_instance
-    if _config_manager_instance is None:
-        _config_manager_instance = ConfigManager()
-    return _config_manager_instance
+    instance = _config_manager_instance
+    if instance is None:
+        # Doble verificación: solo el primer hilo crea la instancia (la
+        # configuración se carga en el primer acceso, ver _ensure_loaded)
+        with _config_manager_lock:
+            if _config_manager_instance is None:
+                _config_manager_instance = ConfigManager()
+            instance = _config_manager_instance
+    return instance
 
 
 # ============================================================================
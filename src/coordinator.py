@@ -15,30 +15,189 @@ Autor: Nerfe5
 Fecha: Noviembre 2025
 """
 
+import os
+import sys
 import threading
 import time
 import logging
-from typing import Dict, List, Optional, Tuple
+from array import array
+from itertools import cycle
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 from pathlib import Path
 
 from src.config_manager import get_config
 from src.metadata_manager import MetadataManager
-from src.network import NetworkManager, NetworkMessage
+from src.network import (
+    CONTENT_ENCODING_RAW, NetworkManager, NetworkMessage, decompress_chunks,
+    iter_console_commands
+)
 from src.block_manager import BlockManager
 
 
+class NodeConfig(NamedTuple):
+    """Datos fijos de un nodo (no cambian mientras el sistema corre)."""
+    node_id: int
+    ip: str
+    puerto: int
+    capacidad_mb: int
+
+
+class NodeTable:
+    """
+    Estado de todos los nodos en formato columnar.
+    
+    Los datos fijos de cada nodo se guardan como NodeConfig; el estado
+    mutable va en columnas (bytearray o array) indexadas por fila.
+    El chequeo de heartbeat solo recorre las columnas activo y
+    ultimo_heartbeat, sin crear ni visitar un objeto por nodo.
+    
+    ultimo_heartbeat guarda time.monotonic_ns(): no le afectan los saltos
+    del reloj de pared (NTP) y la comparación es entre enteros.
+    ultimo_seq guarda la última secuencia de heartbeat en anillo recibida
+    de cada nodo.
+    
+    La lista de nodos activos se cachea y solo se recalcula cuando algún
+    nodo cambia de estado; por eso activo se modifica con set_active().
+    """
+    
+    def __init__(self):
+        self.configs: List[NodeConfig] = []
+        self.node_ids: List[int] = []
+        self.activo = bytearray()
+        self.ultimo_heartbeat = array('q')
+        self.ultimo_seq = array('q')
+        self.bloques_usados = array('q')
+        self.bloques_disponibles = array('q')
+        
+        self._active_ids: Optional[Tuple[int, ...]] = None
+        self._lock = threading.Lock()
+        
+        # Aumenta cada vez que algún nodo cambia de estado
+        self.version = 0
+    
+    def add(self, config: NodeConfig) -> int:
+        """
+        Agrega un nodo (inactivo) a la tabla.
+        
+        Args:
+            config: Datos fijos del nodo
+            
+        Returns:
+            Fila asignada al nodo
+        """
+        self.configs.append(config)
+        self.node_ids.append(config.node_id)
+        self.activo.append(0)
+        self.ultimo_heartbeat.append(0)
+        self.ultimo_seq.append(0)
+        self.bloques_usados.append(0)
+        self.bloques_disponibles.append(config.capacidad_mb)  # 1 bloque = 1 MB
+        return len(self.node_ids) - 1
+    
+    def set_active(self, row: int, active: bool) -> None:
+        """
+        Marca un nodo como activo o inactivo.
+        
+        Args:
+            row: Fila del nodo
+            active: Nuevo estado
+        """
+        value = 1 if active else 0
+        if self.activo[row] != value:
+            with self._lock:
+                self.activo[row] = value
+                self._active_ids = None
+                self.version += 1
+    
+    def active_node_ids(self) -> Tuple[int, ...]:
+        """
+        Retorna los IDs de los nodos activos, en el orden de la tabla.
+        
+        Returns:
+            Tupla de IDs (cacheada hasta el próximo cambio de estado)
+        """
+        active_ids = self._active_ids
+        if active_ids is None:
+            with self._lock:
+                active_ids = tuple(
+                    node_id for node_id, activo in zip(self.node_ids, self.activo)
+                    if activo
+                )
+                self._active_ids = active_ids
+        return active_ids
+
+
 class NodeStatus:
-    """Estado de un nodo en el sistema."""
+    """
+    Estado de un nodo en el sistema.
     
-    def __init__(self, node_id: int, ip: str, puerto: int, capacidad_mb: int):
-        self.node_id = node_id
-        self.ip = ip
-        self.puerto = puerto
-        self.capacidad_mb = capacidad_mb
-        self.activo = False
-        self.ultimo_heartbeat = 0
-        self.bloques_usados = 0
-        self.bloques_disponibles = capacidad_mb  # 1 bloque = 1 MB
+    Vista sobre una fila de NodeTable: los datos viven en la tabla y los
+    atributos leen y escriben directamente en sus columnas.
+    """
+    
+    __slots__ = ("_table", "_row")
+    
+    def __init__(self, table: NodeTable, row: int):
+        self._table = table
+        self._row = row
+    
+    @property
+    def node_id(self) -> int:
+        return self._table.configs[self._row].node_id
+    
+    @property
+    def ip(self) -> str:
+        return self._table.configs[self._row].ip
+    
+    @property
+    def puerto(self) -> int:
+        return self._table.configs[self._row].puerto
+    
+    @property
+    def capacidad_mb(self) -> int:
+        return self._table.configs[self._row].capacidad_mb
+    
+    @property
+    def activo(self) -> bool:
+        return bool(self._table.activo[self._row])
+    
+    @activo.setter
+    def activo(self, value: bool) -> None:
+        self._table.set_active(self._row, value)
+    
+    @property
+    def ultimo_heartbeat(self) -> int:
+        return self._table.ultimo_heartbeat[self._row]
+    
+    @ultimo_heartbeat.setter
+    def ultimo_heartbeat(self, value: int) -> None:
+        self._table.ultimo_heartbeat[self._row] = value
+    
+    @property
+    def ultimo_seq(self) -> int:
+        return self._table.ultimo_seq[self._row]
+    
+    @ultimo_seq.setter
+    def ultimo_seq(self, value: int) -> None:
+        self._table.ultimo_seq[self._row] = value
+    
+    @property
+    def bloques_usados(self) -> int:
+        return self._table.bloques_usados[self._row]
+    
+    @bloques_usados.setter
+    def bloques_usados(self, value: int) -> None:
+        self._table.bloques_usados[self._row] = value
+    
+    @property
+    def bloques_disponibles(self) -> int:
+        return self._table.bloques_disponibles[self._row]
+    
+    @bloques_disponibles.setter
+    def bloques_disponibles(self, value: int) -> None:
+        self._table.bloques_disponibles[self._row] = value
 
 
 class Coordinator:
@@ -52,6 +211,12 @@ class Coordinator:
     - Operaciones de archivos
     """
     
+    # Estadísticas de metadatos que se copian a la respuesta de estado
+    _STATUS_STATS_KEYS = (
+        'total_blocks', 'used_blocks', 'free_blocks',
+        'usage_percentage', 'total_files'
+    )
+    
     def __init__(self, node_id: int):
         """
         Inicializa el coordinador.
@@ -71,6 +236,12 @@ class Coordinator:
         self.node_port = node_config['puerto']
         self.capacidad_mb = node_config['capacidad_mb']
         
+        # Parámetros fijos mientras corre el coordinador: se leen una vez
+        # en lugar de consultarlos en cada vuelta del heartbeat
+        self._capacity_bytes = self.capacidad_mb * 1024 * 1024
+        self._timeout_s = self.config.get_timeout_seconds()
+        self._heartbeat_interval = self.config.get_heartbeat_interval()
+        
         # Configurar logging
         self.logger = logging.getLogger(f"Coordinator-Node{node_id}")
         self.logger.setLevel(logging.INFO)
@@ -78,6 +249,7 @@ class Coordinator:
         # Directorio local para bloques (el coordinador también almacena)
         self.blocks_dir = self.config.get_blocks_directory()
         self.blocks_dir.mkdir(parents=True, exist_ok=True)
+        self._blocks_dir_str = str(self.blocks_dir)
         
         # Gestor de bloques
         self.block_manager = BlockManager(
@@ -87,6 +259,12 @@ class Coordinator:
         # Estado de almacenamiento local
         self.bloques_almacenados = 0
         self.bytes_usados = 0
+        self._usage_lock = threading.Lock()
+        
+        # Tamaño de los bloques guardados por este proceso (block_id ->
+        # bytes). El disco sigue siendo la fuente de verdad: si un bloque
+        # no está aquí se consulta el archivo
+        self._local_block_sizes: Dict[int, int] = {}
         
         # Inicializar gestor de metadatos
         metadata_dir = self.config.get_metadata_directory()
@@ -98,21 +276,68 @@ class Coordinator:
             node_id=node_id,
             host=self.node_ip,
             port=self.node_port,
-            timeout=self.config.get_timeout_seconds()
+            timeout=self._timeout_s
         )
         
-        # Estado de nodos
+        # Estado de nodos (datos en node_table, nodes da acceso por ID)
+        self.node_table = NodeTable()
         self.nodes: Dict[int, NodeStatus] = {}
         self._initialize_nodes()
         
+        # Nodos activos sin el coordinador, con la versión de node_table
+        # con la que se calcularon (se rehacen solo si algún nodo cambió)
+        self._active_peers: Tuple[int, Tuple[int, ...]] = (-1, ())
+        
+        # Plazo sin heartbeat para marcar un nodo como inactivo: tres
+        # timeouts más una vuelta del anillo (un intervalo por salto)
+        self._health_timeout_ns = (
+            self._timeout_s * 3 + len(self._peer_rows) * self._heartbeat_interval
+        ) * 1_000_000_000
+        
+        # Pool para hacer ping a varios nodos a la vez: descubrir N nodos
+        # tarda un timeout en el peor caso, no N
+        self._ping_pool = ThreadPoolExecutor(
+            max_workers=max(1, min(16, len(self.nodes))),
+            thread_name_prefix="ping"
+        )
+        
+        # Filas de nodos caducados con un ping de confirmación en curso (no
+        # se lanza otro hasta que termine)
+        self._health_pings: Set[int] = set()
+        
         # Control de ejecución
         self.is_running = False
-        self.heartbeat_thread: Optional[threading.Thread] = None
+        
+        # Respuesta a PING y RING_HEARTBEAT: siempre es la misma y la
+        # devuelven a la vez varios threads, así que no se modifica nunca
+        # (ni data ni timestamp, que queda con la hora de creación)
+        self._pong_message = NetworkMessage(NetworkMessage.PONG, {}, self.node_id)
+        
+        # Campos fijos de la respuesta de estado
+        self._status_template = {
+            'status': 'online',
+            'node_id': self.node_id,
+            'role': 'coordinator'
+        }
+        
+        # Última respuesta de estado y las versiones (metadatos, nodos)
+        # con las que se calculó; se rehace solo si alguna cambió
+        self._status_cache: Optional[Tuple[Tuple[int, int], Dict]] = None
         
         # Registrar handlers de red
         self._register_network_handlers()
         
-        self.logger.info(f"✅ Coordinador inicializado en {self.node_ip}:{self.node_port}")
+        # Heartbeat: los trabajadores forman un anillo (orden de
+        # config.json) y cada uno envía RING_HEARTBEAT solo a su sucesor;
+        # las secuencias del anillo completo llegan al coordinador desde su
+        # predecesor. La revisión de las marcas de tiempo es una tarea corta
+        # que corre el loop del servidor de red (sin un thread propio que
+        # solo duerme); los pings de confirmación de los nodos caducados se
+        # envían al pool de ping sin esperarlos, así la tarea no hace
+        # operaciones de red
+        self.network.add_periodic_task(self._heartbeat_interval, self._check_nodes_health)
+        
+        self.logger.info("✅ Coordinador inicializado en %s:%s", self.node_ip, self.node_port)
     
     # ========================================================================
     # Inicialización
@@ -124,19 +349,30 @@ class Coordinator:
             node_id = node_config['id']
             
             # Crear estado del nodo
-            self.nodes[node_id] = NodeStatus(
+            row = self.node_table.add(NodeConfig(
                 node_id=node_id,
                 ip=node_config['ip'],
                 puerto=node_config['puerto'],
                 capacidad_mb=node_config['capacidad_mb']
-            )
+            ))
+            self.nodes[node_id] = NodeStatus(self.node_table, row)
             
             # El coordinador siempre está activo
             if node_id == self.node_id:
                 self.nodes[node_id].activo = True
-                self.nodes[node_id].ultimo_heartbeat = time.time()
+                self.nodes[node_id].ultimo_heartbeat = time.monotonic_ns()
+        
+        # Nodos distintos del coordinador (los que se vigilan con ping)
+        self._peer_nodes = [
+            (node_id, node) for node_id, node in self.nodes.items()
+            if node_id != self.node_id
+        ]
+        self._peer_rows = [
+            row for row, node_id in enumerate(self.node_table.node_ids)
+            if node_id != self.node_id
+        ]
         
-        self.logger.info(f"Nodos inicializados: {len(self.nodes)} nodos")
+        self.logger.info("Nodos inicializados: %s nodos", len(self.nodes))
     
     def _register_network_handlers(self) -> None:
         """Registra handlers para mensajes de red."""
@@ -144,6 +380,10 @@ class Coordinator:
             NetworkMessage.PING,
             self._handle_ping
         )
+        self.network.register_handler(
+            NetworkMessage.RING_HEARTBEAT,
+            self._handle_ring_heartbeat
+        )
         self.network.register_handler(
             NetworkMessage.GET_STATUS,
             self._handle_get_status
@@ -152,7 +392,8 @@ class Coordinator:
         # Handlers de bloques (el coordinador también almacena bloques)
         self.network.register_handler(
             NetworkMessage.UPLOAD_BLOCK,
-            self._handle_upload_block
+            self._handle_upload_block,
+            stream_payload=True
         )
         self.network.register_handler(
             NetworkMessage.DOWNLOAD_BLOCK,
@@ -188,13 +429,7 @@ class Coordinator:
             self.logger.error("❌ Error al iniciar servidor de red")
             return False
         
-        # Iniciar thread de heartbeat
         self.is_running = True
-        self.heartbeat_thread = threading.Thread(
-            target=self._heartbeat_loop,
-            daemon=True
-        )
-        self.heartbeat_thread.start()
         
         # Detectar nodos activos
         self._discover_nodes()
@@ -211,10 +446,8 @@ class Coordinator:
         
         self.is_running = False
         
-        if self.heartbeat_thread:
-            self.heartbeat_thread.join(timeout=2.0)
-        
         self.network.stop_server()
+        self._ping_pool.shutdown(wait=False)
         
         self.logger.info("Coordinador detenido")
         print("👋 Coordinador detenido correctamente\n")
@@ -223,56 +456,122 @@ class Coordinator:
     # Heartbeat y detección de nodos
     # ========================================================================
     
-    def _heartbeat_loop(self) -> None:
-        """Loop de heartbeat para detectar nodos activos."""
-        interval = self.config.get_heartbeat_interval()
-        
-        while self.is_running:
-            self._check_nodes_health()
-            time.sleep(interval)
-    
     def _discover_nodes(self) -> None:
         """Descubre nodos activos en el sistema."""
         print("🔍 Descubriendo nodos activos...")
         
-        for node_id, node in self.nodes.items():
-            if node_id == self.node_id:
-                continue  # Saltar el coordinador mismo
-            
-            # Hacer ping al nodo
-            if self.network.ping_node(node.ip, node.puerto):
+        others = self._peer_nodes
+        
+        # Hacer ping a todos los nodos en paralelo
+        results = self._ping_nodes([(node.ip, node.puerto) for _, node in others])
+        
+        # El resultado se escribe de una vez al terminar
+        lines = []
+        for (node_id, node), alive in zip(others, results):
+            if alive:
                 node.activo = True
-                node.ultimo_heartbeat = time.time()
-                print(f"   ✅ Nodo {node_id} ({node.ip}:{node.puerto}) - ACTIVO")
+                node.ultimo_heartbeat = time.monotonic_ns()
+                lines.append(f"   ✅ Nodo {node_id} ({node.ip}:{node.puerto}) - ACTIVO")
             else:
                 node.activo = False
-                print(f"   ❌ Nodo {node_id} ({node.ip}:{node.puerto}) - INACTIVO")
+                lines.append(f"   ❌ Nodo {node_id} ({node.ip}:{node.puerto}) - INACTIVO")
         
-        print()
+        lines.append("")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def _check_nodes_health(self) -> None:
-        """Verifica el estado de salud de todos los nodos."""
-        timeout = self.config.get_timeout_seconds()
-        current_time = time.time()
+        """
+        Marca como inactivos los nodos sin heartbeat reciente.
         
-        for node_id, node in self.nodes.items():
-            if node_id == self.node_id:
-                continue  # El coordinador siempre está activo
+        Audita ultimo_heartbeat sin contactar a los nodos; a los que
+        pasaron el plazo se les envía un ping de confirmación en el pool de
+        ping, sin esperarlo (corre en el loop del servidor de red). Se
+        marcan inactivos en _confirm_node_health solo si no responden (un
+        nodo puede llegar al coordinador aunque no a sus sucesores del
+        anillo). El plazo incluye una vuelta del anillo: la secuencia de un
+        nodo puede tardar hasta un intervalo por salto en llegar al
+        coordinador.
+        """
+        # Tiempos en nanosegundos de reloj monotónico
+        timeout_ns = self._health_timeout_ns
+        current_time = time.monotonic_ns()
+        table = self.node_table
+        
+        # Recorre solo las columnas de estado (el coordinador siempre está
+        # activo y no se incluye). Un nodo activo caduca si su último
+        # heartbeat es anterior al instante de corte: una sola comparación
+        # por fila
+        cutoff = current_time - timeout_ns
+        activo = table.activo
+        ultimo_heartbeat = table.ultimo_heartbeat
+        expired = [
+            row for row in self._peer_rows
+            if activo[row] and ultimo_heartbeat[row] < cutoff
+            and row not in self._health_pings
+        ]
+        
+        # Confirmar con ping antes de darlos por caídos
+        for row in expired:
+            config = table.configs[row]
+            try:
+                future = self._ping_pool.submit(
+                    self.network.ping_node, config.ip, config.puerto
+                )
+            except RuntimeError:
+                # Pool cerrado: el coordinador se está deteniendo
+                return
+            self._health_pings.add(row)
+            future.add_done_callback(partial(self._confirm_node_health, row, cutoff))
+    
+    def _confirm_node_health(self, row: int, cutoff: int, future: Future) -> None:
+        """
+        Aplica el resultado del ping de confirmación a un nodo caducado.
+        
+        Corre en el pool de ping al terminar el ping.
+        
+        Args:
+            row: Fila del nodo en la tabla de nodos
+            cutoff: Instante de corte (ns) con el que se dio por caducado
+            future: Futuro del ping (resultado True si respondió)
+        """
+        table = self.node_table
+        try:
+            alive = not future.cancelled() and future.result()
+        except Exception:
+            alive = False
+        
+        current_time = time.monotonic_ns()
+        ultimo_heartbeat = table.ultimo_heartbeat
+        if alive:
+            ultimo_heartbeat[row] = current_time
+        elif ultimo_heartbeat[row] < cutoff:
+            # Sin respuesta ni heartbeat nuevo mientras tanto
+            table.set_active(row, False)
+            self.logger.warning(
+                "⚠️ Nodo %s marcado como INACTIVO (sin heartbeat por %.1fs)",
+                table.node_ids[row], (current_time - ultimo_heartbeat[row]) / 1e9
+            )
+        
+        self._health_pings.discard(row)
+    
+    def _ping_nodes(self, addresses: List[Tuple[str, int]]) -> List[bool]:
+        """
+        Hace ping a varios nodos en paralelo.
+        
+        Args:
+            addresses: Lista de (ip, puerto)
             
-            # Si el nodo está marcado como activo, verificar heartbeat
-            if node.activo:
-                time_since_heartbeat = current_time - node.ultimo_heartbeat
-                
-                if time_since_heartbeat > (timeout * 3):
-                    # Hacer ping para confirmar
-                    if not self.network.ping_node(node.ip, node.puerto):
-                        node.activo = False
-                        self.logger.warning(
-                            f"⚠️ Nodo {node_id} marcado como INACTIVO "
-                            f"(sin respuesta por {time_since_heartbeat:.1f}s)"
-                        )
-                    else:
-                        node.ultimo_heartbeat = current_time
+        Returns:
+            Lista de resultados en el mismo orden (True si responde)
+        """
+        if len(addresses) <= 1:
+            return [self.network.ping_node(ip, puerto) for ip, puerto in addresses]
+        
+        futures = [
+            self._ping_pool.submit(self.network.ping_node, ip, puerto)
+            for ip, puerto in addresses
+        ]
+        return [future.result() for future in futures]
     
     def get_active_nodes(self) -> List[int]:
         """
@@ -281,10 +580,17 @@ class Coordinator:
         Returns:
             Lista de IDs de nodos activos
         """
-        return [
-            node_id for node_id, node in self.nodes.items()
-            if node.activo and node_id != self.node_id
-        ]
+        version = self.node_table.version
+        cached_version, peers = self._active_peers
+        if cached_version != version:
+            peers = tuple(
+                node_id for node_id in self.node_table.active_node_ids()
+                if node_id != self.node_id
+            )
+            self._active_peers = (version, peers)
+        
+        # Lista nueva: quien llama puede modificarla
+        return list(peers)
     
     # ========================================================================
     # Asignación de bloques
@@ -318,23 +624,13 @@ class Coordinator:
                 f"Activos: {len(active_nodes)}"
             )
         
-        # Asignar bloques usando round-robin con replicación
-        assignments = []
+        # Asignar bloques usando round-robin con replicación: el primario
+        # recorre la lista de nodos y la réplica es el siguiente nodo (con
+        # 2 o más nodos nunca coinciden)
+        primaries = cycle(active_nodes)
+        replicas = cycle(active_nodes[1:] + active_nodes[:1])
         
-        for i, block_id in enumerate(free_blocks):
-            # Seleccionar nodo primario (round-robin)
-            primary_node = active_nodes[i % len(active_nodes)]
-            
-            # Seleccionar nodo réplica (siguiente en la lista)
-            replica_node = active_nodes[(i + 1) % len(active_nodes)]
-            
-            # Asegurar que sean diferentes
-            if primary_node == replica_node and len(active_nodes) > 1:
-                replica_node = active_nodes[(i + 2) % len(active_nodes)]
-            
-            assignments.append((block_id, primary_node, replica_node))
-        
-        return assignments
+        return list(zip(free_blocks, primaries, replicas))
     
     # ========================================================================
     # Handlers de red
@@ -347,28 +643,65 @@ class Coordinator:
         # Actualizar heartbeat del nodo
         if sender_id in self.nodes:
             self.nodes[sender_id].activo = True
-            self.nodes[sender_id].ultimo_heartbeat = time.time()
+            self.nodes[sender_id].ultimo_heartbeat = time.monotonic_ns()
+        
+        return self._pong_message
+    
+    def _handle_ring_heartbeat(self, message: NetworkMessage) -> NetworkMessage:
+        """
+        Handler para mensajes RING_HEARTBEAT.
+        
+        El mensaje llega del nodo anterior en el anillo y trae pares
+        (node_id, seq) con la última secuencia vista de cada trabajador.
+        Solo se renueva el heartbeat de los nodos cuya secuencia avanzó:
+        una entrada repetida de un nodo que ya no envía no lo mantiene
+        activo.
+        """
+        current_time = time.monotonic_ns()
+        
+        for node_id, seq in message.data.get('seqs', ()):
+            node = self.nodes.get(node_id)
+            if node is None or node_id == self.node_id:
+                continue
+            if seq > node.ultimo_seq:
+                node.ultimo_seq = seq
+                node.ultimo_heartbeat = current_time
+                node.activo = True
         
-        return NetworkMessage(NetworkMessage.PONG, {}, self.node_id)
+        return self._pong_message
     
     def _handle_get_status(self, message: NetworkMessage) -> NetworkMessage:
         """Handler para solicitud de estado."""
-        stats = self.metadata.get_statistics()
-        
-        active_nodes = self.get_active_nodes()
+        # Las versiones se leen antes de calcular: si algo cambia mientras
+        # tanto, la próxima consulta ya no coincide y se recalcula
+        version = (self.metadata.version, self.node_table.version)
+        cached = self._status_cache
+        if cached is not None and cached[0] == version:
+            status = cached[1]
+        else:
+            stats = self.metadata.get_statistics()
+            
+            active_nodes = self.get_active_nodes()
+            
+            # Campos fijos precalculados + campos que cambian con el estado
+            status = self._status_template.copy()
+            for key in self._STATUS_STATS_KEYS:
+                status[key] = stats[key]
+            status['active_nodes'] = len(active_nodes) + 1  # +1 por el coordinador
+            active_nodes.append(self.node_id)
+            status['nodes_list'] = active_nodes
+            
+            self._status_cache = (version, status)
         
-        status = {
-            'status': 'online',
-            'node_id': self.node_id,
-            'role': 'coordinator',
-            'total_blocks': stats['total_blocks'],
-            'used_blocks': stats['used_blocks'],
-            'free_blocks': stats['free_blocks'],
-            'usage_percentage': stats['usage_percentage'],
-            'total_files': stats['total_files'],
-            'active_nodes': len(active_nodes) + 1,  # +1 por el coordinador
-            'nodes_list': active_nodes + [self.node_id]
-        }
+        # Formato binario compacto si el solicitante lo pide: los campos
+        # empaquetados viajan como payload, sin pasar por JSON
+        if message.data.get('compact'):
+            return NetworkMessage(
+                NetworkMessage.STATUS_RESPONSE,
+                {'compact': True},
+                self.node_id,
+                payload=NetworkMessage.pack_status(status)
+            )
         
         return NetworkMessage(
             NetworkMessage.STATUS_RESPONSE,
@@ -383,27 +716,43 @@ class Coordinator:
         """
         block_id = message.data.get('block_id')
         file_name = message.data.get('file_name')
-        block_data_hex = message.data.get('data')
         block_hash = message.data.get('hash')
         
-        self.logger.info(f"📥 Solicitud de subida: bloque {block_id} de {file_name}")
+        self.logger.info("📥 Solicitud de subida: bloque %s de %s", block_id, file_name)
         
         try:
-            # Convertir datos de hex a bytes
-            block_data = bytes.fromhex(block_data_hex)
+            if message.payload_chunks is not None:
+                # Payload recibido por partes: se escribe a disco y se
+                # calcula el hash a medida que llega (descomprimido si el
+                # emisor lo envió comprimido; el hash es del bloque original)
+                chunks = message.payload_chunks
+                encoding = message.data.get('content_encoding', CONTENT_ENCODING_RAW)
+                if encoding != CONTENT_ENCODING_RAW:
+                    chunks = decompress_chunks(chunks, encoding)
+                hash_ok, stored = self._store_block_stream(
+                    block_id, chunks, message.data.get('size', message.payload_len), block_hash
+                )
+            else:
+                # Datos del bloque: payload binario (o hex en el JSON, formato
+                # de clientes anteriores)
+                if message.payload is not None:
+                    block_data = message.payload
+                else:
+                    block_data = bytes.fromhex(message.data.get('data'))
+                
+                # Verificar hash
+                hash_ok = self.block_manager._calculate_hash(block_data) == block_hash
+                stored = hash_ok and self._store_block(block_id, block_data, file_name)
             
-            # Verificar hash
-            calculated_hash = self.block_manager._calculate_hash(block_data)
-            if calculated_hash != block_hash:
-                self.logger.error(f"❌ Hash no coincide para bloque {block_id}")
+            if not hash_ok:
+                self.logger.error("❌ Hash no coincide para bloque %s", block_id)
                 return NetworkMessage(
                     NetworkMessage.ERROR,
                     {'error': 'Hash verification failed'},
                     self.node_id
                 )
             
-            # Almacenar bloque
-            if self._store_block(block_id, block_data, file_name):
+            if stored:
                 response_data = {
                     'success': True,
                     'block_id': block_id,
@@ -422,7 +771,7 @@ class Coordinator:
                 )
                 
         except Exception as e:
-            self.logger.error(f"❌ Error procesando bloque {block_id}: {e}")
+            self.logger.error("❌ Error procesando bloque %s: %s", block_id, e)
             return NetworkMessage(
                 NetworkMessage.ERROR,
                 {'error': str(e)},
@@ -436,23 +785,33 @@ class Coordinator:
         """
         block_id = message.data.get('block_id')
         
-        self.logger.info(f"📤 Solicitud de descarga: bloque {block_id}")
+        self.logger.info("📤 Solicitud de descarga: bloque %s", block_id)
         
         try:
-            # Recuperar bloque
-            block_data = self._retrieve_block(block_id)
+            # Solo se consulta el tamaño: el archivo se envía con sendfile
+            # directamente desde disco, sin leerlo a memoria
+            block_path = self._block_path(block_id)
+            block_size = self._local_block_sizes.get(block_id)
+            if block_size is None:
+                try:
+                    block_size = os.stat(block_path).st_size
+                except FileNotFoundError:
+                    block_size = 0
+                    self.logger.warning("⚠️ Bloque %s no encontrado", block_id)
             
-            if block_data:
+            if block_size:
                 response_data = {
                     'success': True,
                     'block_id': block_id,
-                    'data': block_data.hex(),
-                    'size': len(block_data)
+                    'size': block_size
                 }
+                self.logger.info("✅ Bloque %s recuperado (%s bytes)", block_id, block_size)
+                # Los datos viajan como payload binario tras el JSON
                 return NetworkMessage(
                     NetworkMessage.STATUS_RESPONSE,
                     response_data,
-                    self.node_id
+                    self.node_id,
+                    payload_file=(block_path, block_size)
                 )
             else:
                 return NetworkMessage(
@@ -462,7 +821,7 @@ class Coordinator:
                 )
                 
         except Exception as e:
-            self.logger.error(f"❌ Error recuperando bloque {block_id}: {e}")
+            self.logger.error("❌ Error recuperando bloque %s: %s", block_id, e)
             return NetworkMessage(
                 NetworkMessage.ERROR,
                 {'error': str(e)},
@@ -487,6 +846,21 @@ class Coordinator:
             self.node_id
         )
     
+    def _block_path(self, block_id: int) -> str:
+        """
+        Retorna la ruta del archivo de un bloque local.
+        
+        Se arma sobre la ruta del directorio ya convertida a str, sin crear
+        objetos Path en cada operación de bloque.
+        
+        Args:
+            block_id: ID del bloque
+            
+        Returns:
+            Ruta del archivo block_XXXXXX.bin
+        """
+        return f"{self._blocks_dir_str}/block_{block_id:06d}.bin"
+    
     def _store_block(self, block_id: int, block_data: bytes, file_name: str) -> bool:
         """Almacena un bloque localmente."""
         try:
@@ -494,96 +868,165 @@ class Coordinator:
                 self.logger.error("❌ No hay espacio suficiente")
                 return False
             
-            block_filename = f"block_{block_id:06d}.bin"
-            block_path = self.blocks_dir / block_filename
+            block_path = self._block_path(block_id)
             
-            self.block_manager.write_block(str(block_path), block_data)
+            self.block_manager.write_block(block_path, block_data)
+            self._local_block_sizes[block_id] = len(block_data)
             
-            self.bloques_almacenados += 1
-            self.bytes_usados += len(block_data)
+            self._update_usage(1, len(block_data))
             
-            self.logger.info(f"✅ Bloque {block_id} almacenado ({len(block_data)} bytes)")
+            self.logger.info("✅ Bloque %s almacenado (%s bytes)", block_id, len(block_data))
             return True
             
         except Exception as e:
-            self.logger.error(f"❌ Error almacenando bloque {block_id}: {e}")
+            self.logger.error("❌ Error almacenando bloque %s: %s", block_id, e)
             return False
     
+    def _store_block_stream(
+        self,
+        block_id: int,
+        chunks: Iterator[memoryview],
+        block_size: int,
+        block_hash: str
+    ) -> Tuple[bool, bool]:
+        """
+        Almacena un bloque que llega por partes, verificando su hash.
+        
+        El bloque se escribe a disco a medida que se recibe; no se carga
+        entero en memoria.
+        
+        Args:
+            block_id: ID del bloque
+            chunks: Partes del bloque (message.payload_chunks, ya
+                    descomprimidas)
+            block_size: Tamaño anunciado del bloque (para verificar espacio)
+            block_hash: Hash esperado
+            
+        Returns:
+            (hash_ok, almacenado): hash_ok es False solo si el hash no coincide
+        """
+        try:
+            if not self._has_space_for_block(block_size):
+                self.logger.error("❌ No hay espacio suficiente")
+                return True, False
+            
+            block_path = self._block_path(block_id)
+            block_size = self.block_manager.write_block_stream(block_path, chunks, block_hash)
+            if block_size is None:
+                return False, False
+            
+            self._local_block_sizes[block_id] = block_size
+            self._update_usage(1, block_size)
+            
+            self.logger.info("✅ Bloque %s almacenado (%s bytes)", block_id, block_size)
+            return True, True
+            
+        except Exception as e:
+            self.logger.error("❌ Error almacenando bloque %s: %s", block_id, e)
+            return True, False
+    
     def _retrieve_block(self, block_id: int):
         """Recupera un bloque local."""
         try:
-            block_filename = f"block_{block_id:06d}.bin"
-            block_path = self.blocks_dir / block_filename
+            block_path = self._block_path(block_id)
             
-            if not block_path.exists():
-                self.logger.warning(f"⚠️ Bloque {block_id} no encontrado")
+            if block_id not in self._local_block_sizes and not os.path.exists(block_path):
+                self.logger.warning("⚠️ Bloque %s no encontrado", block_id)
                 return None
             
-            block_data = self.block_manager.read_block(str(block_path))
-            self.logger.info(f"✅ Bloque {block_id} recuperado ({len(block_data)} bytes)")
+            block_data = self.block_manager.read_block(block_path)
+            self.logger.info("✅ Bloque %s recuperado (%s bytes)", block_id, len(block_data))
             return block_data
             
         except Exception as e:
-            self.logger.error(f"❌ Error recuperando bloque {block_id}: {e}")
+            self.logger.error("❌ Error recuperando bloque %s: %s", block_id, e)
             return None
     
     def _delete_block(self, block_id: int) -> bool:
         """Elimina un bloque local."""
         try:
-            block_filename = f"block_{block_id:06d}.bin"
-            block_path = self.blocks_dir / block_filename
+            block_path = self._block_path(block_id)
             
-            if not block_path.exists():
-                self.logger.warning(f"⚠️ Bloque {block_id} no existe")
-                return False
-            
-            block_size = block_path.stat().st_size
+            # Tamaño desde el registro local; si no está, desde el disco
+            block_size = self._local_block_sizes.pop(block_id, None)
+            if block_size is None:
+                try:
+                    block_size = os.stat(block_path).st_size
+                except FileNotFoundError:
+                    self.logger.warning("⚠️ Bloque %s no existe", block_id)
+                    return False
             
-            if self.block_manager.delete_block(str(block_path)):
-                self.bloques_almacenados -= 1
-                self.bytes_usados -= block_size
-                self.logger.info(f"✅ Bloque {block_id} eliminado")
+            if self.block_manager.delete_block(block_path):
+                self._update_usage(-1, -block_size)
+                self.logger.info("✅ Bloque %s eliminado", block_id)
                 return True
             
             return False
             
         except Exception as e:
-            self.logger.error(f"❌ Error eliminando bloque {block_id}: {e}")
+            self.logger.error("❌ Error eliminando bloque %s: %s", block_id, e)
             return False
     
+    def _update_usage(self, blocks_delta: int, bytes_delta: int) -> None:
+        """
+        Actualiza los contadores de uso local.
+        
+        Los handlers de red corren en threads distintos y `+=` sobre un
+        atributo no es atómico; el lock solo cubre la suma.
+        
+        Args:
+            blocks_delta: Cambio en el número de bloques
+            bytes_delta: Cambio en bytes usados
+        """
+        with self._usage_lock:
+            self.bloques_almacenados += blocks_delta
+            self.bytes_usados += bytes_delta
+    
     def _has_space_for_block(self, block_size: int) -> bool:
         """Verifica si hay espacio para un bloque."""
-        capacity_bytes = self.capacidad_mb * 1024 * 1024
-        return (self.bytes_usados + block_size) <= capacity_bytes
+        return self.bytes_usados + block_size <= self._capacity_bytes
     
     # ========================================================================
     # Utilidades y visualización
     # ========================================================================
     
-    def _print_status(self) -> None:
-        """Imprime el estado actual del sistema."""
-        print("\n" + "="*70)
-        print("  📊 ESTADO DEL SISTEMA")
-        print("="*70)
+    def _iter_status_lines(self) -> Iterator[str]:
+        """
+        Genera, línea a línea, el reporte de estado del sistema.
+        
+        Permite mostrar el estado por otros medios (GUI, red) sin pasar
+        por stdout.
+        
+        Yields:
+            Líneas del reporte (sin salto de línea final)
+        """
+        yield ""
+        yield "="*70
+        yield "  📊 ESTADO DEL SISTEMA"
+        yield "="*70
         
         # Estado de nodos
-        print("\n💻 NODOS:")
+        yield "\n💻 NODOS:"
         for node_id, node in sorted(self.nodes.items()):
             status = "✅ ACTIVO" if node.activo else "❌ INACTIVO"
             role = " [COORDINADOR]" if node_id == self.node_id else ""
-            print(f"   Nodo {node_id}: {status} - {node.ip}:{node.puerto}{role}")
+            yield f"   Nodo {node_id}: {status} - {node.ip}:{node.puerto}{role}"
         
         # Estadísticas de metadatos
         stats = self.metadata.get_statistics()
-        print("\n📦 ALMACENAMIENTO:")
-        print(f"   Total de bloques: {stats['total_blocks']}")
-        print(f"   Bloques usados: {stats['used_blocks']}")
-        print(f"   Bloques libres: {stats['free_blocks']}")
-        print(f"   Uso: {stats['usage_percentage']:.1f}%")
-        print(f"   Archivos: {stats['total_files']}")
-        print(f"   Tamaño total: {stats['total_size_mb']:.2f} MB")
-        
-        print("="*70 + "\n")
+        yield "\n📦 ALMACENAMIENTO:"
+        yield f"   Total de bloques: {stats['total_blocks']}"
+        yield f"   Bloques usados: {stats['used_blocks']}"
+        yield f"   Bloques libres: {stats['free_blocks']}"
+        yield f"   Uso: {stats['usage_percentage']:.1f}%"
+        yield f"   Archivos: {stats['total_files']}"
+        yield f"   Tamaño total: {stats['total_size_mb']:.2f} MB"
+        yield "="*70 + "\n"
+    
+    def _print_status(self) -> None:
+        """Imprime el estado actual del sistema."""
+        # Se escribe con una sola llamada
+        sys.stdout.write("\n".join(self._iter_status_lines()) + "\n")
     
     def print_detailed_status(self) -> None:
         """Imprime estado detallado con tablas."""
@@ -610,9 +1053,7 @@ class Coordinator:
         print()
         
         try:
-            while True:
-                cmd = input("coordinator> ").strip().lower()
-                
+            for cmd in iter_console_commands("coordinator> ", lambda: self.is_running):
                 if cmd == 'quit' or cmd == 'exit':
                     break
                 elif cmd == 'status':
@@ -22,15 +22,78 @@ Fecha: Noviembre 2025
 """
 
 import os
+import hashlib
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
+from itertools import cycle
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from src.config_manager import get_config
 from src.block_manager import BlockManager
 from src.metadata_manager import MetadataManager, FileMetadata, BlockEntry
-from src.network import NetworkManager, NetworkMessage
+from src.network import (
+    CONTENT_ENCODING_RAW, SUPPORTED_CONTENT_ENCODINGS,
+    NetworkManager, NetworkMessage, compress_payload
+)
+
+
+# Bloques que se envían a la vez durante una subida. Cada bloque en vuelo
+# está en memoria, así que la ventana acota la RAM a N * tamaño de bloque
+UPLOAD_WINDOW_BLOCKS = 8
+
+# Bloques que se piden a la vez durante una descarga (misma cota de memoria)
+DOWNLOAD_WINDOW_BLOCKS = 16
+
+# Peticiones de borrado simultáneas al eliminar un archivo
+DELETE_PARALLEL_REQUESTS = 16
+
+
+def _progress_changed(done: int, total: int) -> bool:
+    """
+    Indica si hay que mostrar la línea de progreso del bloque `done`.
+    
+    Solo se muestra cuando cambia el porcentaje entero (y en el último
+    bloque): como mucho ~100 líneas por operación, en lugar de una por
+    bloque, que con miles de bloques frena el bucle escribiendo en consola.
+    
+    Args:
+        done: Bloques completados (1..total)
+        total: Total de bloques
+        
+    Returns:
+        True si se debe mostrar el progreso
+    """
+    return done == total or done * 100 // total != (done - 1) * 100 // total
+
+
+def _write_blocks(f, blocks: List[bytes]) -> None:
+    """
+    Escribe varios bloques consecutivos en un archivo sin buffer.
+    
+    Con os.writev todos los bloques se escriben en una sola llamada al
+    sistema, sin concatenarlos antes en memoria. Si la escritura es parcial
+    se continúa desde donde quedó.
+    
+    Args:
+        f: Archivo abierto en modo binario sin buffer (buffering=0)
+        blocks: Bloques a escribir, en orden
+    """
+    if not hasattr(os, 'writev'):
+        for block in blocks:
+            f.write(block)
+        return
+    
+    buffers = [memoryview(block) for block in blocks]
+    while buffers:
+        written = os.writev(f.fileno(), buffers)
+        while buffers and written >= len(buffers[0]):
+            written -= len(buffers[0])
+            buffers.pop(0)
+        if buffers and written:
+            buffers[0] = buffers[0][written:]
 
 
 class FileOperationResult:
@@ -98,6 +161,15 @@ class FileOperations:
             timeout=self.config.get_timeout_seconds()
         )
         
+        # Compresión de los bloques al enviarlos (config "red.compresion")
+        self.wire_compression = self.config.get_wire_compression()
+        if self.wire_compression not in SUPPORTED_CONTENT_ENCODINGS:
+            self.logger.warning(
+                f"⚠️ Compresión '{self.wire_compression}' no disponible, "
+                "se envían los bloques sin comprimir"
+            )
+            self.wire_compression = CONTENT_ENCODING_RAW
+        
         self.logger.info("✅ FileOperations inicializado")
     
     # ========================================================================
@@ -182,98 +254,106 @@ class FileOperations:
                 f"Por favor, libera espacio eliminando archivos o agrega más nodos al sistema."
             )
         
+        free_blocks: List[int] = []
+        
         try:
-            # Paso 1: Dividir archivo en bloques (en memoria)
+            # Paso 1: Dividir archivo en bloques. Los bloques se leen en
+            # streaming al enviarlos (paso 4): solo los de la ventana de
+            # envío están en memoria.
             print("📦 Dividiendo archivo en bloques...")
-            blocks_data = self.block_manager.split_file_to_memory(str(file_path))
-            num_blocks = len(blocks_data)
-            file_size = file_path.stat().st_size
+            num_blocks = num_blocks_needed
+            blocks_data = self.block_manager.iter_split_file_to_memory(str(file_path))
             
-            print(f"   ✓ {num_blocks} bloques creados ({file_size:,} bytes)")
+            print(f"   ✓ {num_blocks} bloques a enviar ({file_size:,} bytes)")
             
-            # Paso 2: Calcular hash del archivo completo
-            print("🔐 Calculando hash del archivo...")
-            file_hash = self.block_manager.calculate_hash(str(file_path))
-            print(f"   ✓ Hash: {file_hash[:16]}...")
+            # Paso 2: El hash del archivo completo se calcula con los mismos
+            # bloques que se envían (paso 4), sin volver a leer el archivo
+            file_hasher = hashlib.sha256()
             
-            # Paso 3: Obtener bloques libres y asignar a nodos
+            # Paso 3: Reservar bloques libres (otra subida simultánea no
+            # puede recibir los mismos IDs) y asignarlos a nodos
             print("🎯 Asignando bloques a nodos...")
-            free_blocks = self.metadata.get_free_blocks(num_blocks)
+            free_blocks = self.metadata.reserve_blocks(num_blocks)
             
-            # Asignar usando round-robin con replicación
-            assignments = []
-            for i, block_id in enumerate(free_blocks):
-                primary_node = active_nodes[i % len(active_nodes)]
-                replica_node = active_nodes[(i + 1) % len(active_nodes)]
-                
-                # Asegurar que sean diferentes
-                if primary_node == replica_node and len(active_nodes) > 1:
-                    replica_node = active_nodes[(i + 2) % len(active_nodes)]
-                
-                assignments.append((block_id, primary_node, replica_node))
+            # Asignar usando round-robin con replicación (la réplica es el
+            # siguiente nodo de la lista; hay al menos 2 nodos)
+            assignments = list(zip(
+                free_blocks,
+                cycle(active_nodes),
+                cycle(active_nodes[1:] + active_nodes[:1])
+            ))
             
             print(f"   ✓ Bloques asignados a {len(active_nodes)} nodos")
             
             # Paso 4: Enviar bloques a nodos
             print("📡 Enviando bloques a nodos...")
             
-            for i, (block_id, primary_node, replica_node) in enumerate(assignments):
-                block_data, block_hash = blocks_data[i]
-                
-                # Obtener configuración de nodos
-                primary_config = self.config.get_node_by_id(primary_node)
-                replica_config = self.config.get_node_by_id(replica_node)
+            # Primario y réplica de cada bloque se envían a la vez, con hasta
+            # UPLOAD_WINDOW_BLOCKS bloques en vuelo. Los bloques se confirman
+            # en orden, cuando sus dos envíos han terminado, y se registran
+            # todos juntos en los metadatos al final
+            failed_block = None
+            sent_blocks = 0
+            block_entries: List[BlockEntry] = []
+            max_workers = 2 * min(len(active_nodes), UPLOAD_WINDOW_BLOCKS)
+            
+            with ThreadPoolExecutor(max_workers=max_workers,
+                                    thread_name_prefix="upload") as executor:
+                pending = deque()
                 
-                # Enviar a nodo primario
-                print(f"   Enviando a nodo primario {primary_node} ({primary_config['ip']}:{primary_config['puerto']})...")
-                success_primary = self._send_block_to_node(
-                    block_id,
-                    block_data,
-                    block_hash,
-                    file_name,
-                    primary_config['ip'],
-                    primary_config['puerto']
-                )
-                print(f"   Resultado primario: {'✅ OK' if success_primary else '❌ FALLO'}")
-                
-                # Enviar a nodo réplica
-                print(f"   Enviando a nodo réplica {replica_node} ({replica_config['ip']}:{replica_config['puerto']})...")
-                success_replica = self._send_block_to_node(
-                    block_id,
-                    block_data,
-                    block_hash,
-                    file_name,
-                    replica_config['ip'],
-                    replica_config['puerto']
-                )
-                print(f"   Resultado réplica: {'✅ OK' if success_replica else '❌ FALLO'}")
+                for i, ((block_id, primary_node, replica_node), (block_data, block_hash)) in enumerate(
+                    zip(assignments, blocks_data)
+                ):
+                    file_hasher.update(block_data)
+                    futures = tuple(
+                        executor.submit(
+                            self._send_block_to_node,
+                            block_id,
+                            block_data,
+                            block_hash,
+                            file_name,
+                            *self.config.get_node_address(node_id)
+                        )
+                        for node_id in (primary_node, replica_node)
+                    )
+                    pending.append(
+                        (i, block_id, primary_node, replica_node,
+                         len(block_data), block_hash, futures)
+                    )
+                    sent_blocks = i + 1
+                    
+                    if len(pending) >= UPLOAD_WINDOW_BLOCKS:
+                        failed_block = self._commit_block_upload(
+                            pending.popleft(), file_name, num_blocks, block_entries
+                        )
+                        if failed_block is not None:
+                            break
                 
-                if not success_primary or not success_replica:
-                    # Rollback: eliminar bloques ya enviados
-                    print(f"\n❌ Fallo en envío: primario={success_primary}, réplica={success_replica}")
-                    self._rollback_upload(assignments[:i], file_name)
-                    return FileOperationResult(
-                        False,
-                        f"Error al enviar bloque {block_id} a nodos"
+                while pending and failed_block is None:
+                    failed_block = self._commit_block_upload(
+                        pending.popleft(), file_name, num_blocks, block_entries
                     )
                 
-                # Actualizar metadatos del bloque
-                self.metadata.allocate_block(
-                    block_id=block_id,
-                    file_name=file_name,
-                    block_index=i,
-                    primary_node=primary_node,
-                    replica_node=replica_node,
-                    size_bytes=len(block_data),
-                    block_hash=block_hash
+                # Ante un fallo, no iniciar los envíos que aún no empezaron;
+                # al salir del with se espera a los que están en curso
+                for *_, futures in pending:
+                    for future in futures:
+                        future.cancel()
+            
+            if failed_block is not None:
+                # Rollback: eliminar todos los bloques enviados o en vuelo
+                self._rollback_upload(assignments[:sent_blocks], file_name, free_blocks)
+                return FileOperationResult(
+                    False,
+                    f"Error al enviar bloque {failed_block} a nodos"
                 )
-                
-                progress = ((i + 1) / num_blocks) * 100
-                print(f"   [{progress:5.1f}%] Bloque {i+1}/{num_blocks} → "
-                      f"Nodo {primary_node} (primario), Nodo {replica_node} (réplica)")
             
-            # Paso 5: Registrar archivo en metadatos
+            file_hash = file_hasher.hexdigest()
+            print(f"🔐 Hash del archivo: {file_hash[:16]}...")
+            
+            # Paso 5: Registrar bloques y archivo en metadatos
             print("💾 Registrando archivo en metadatos...")
+            self.metadata.allocate_blocks(block_entries)
             self.metadata.register_file(
                 file_name=file_name,
                 total_size=file_size,
@@ -299,8 +379,56 @@ class FileOperations:
             
         except Exception as e:
             self.logger.error(f"Error al subir archivo: {e}")
+            # Devolver la reserva (los bloques ya asignados no se tocan)
+            self.metadata.release_blocks(free_blocks)
             return FileOperationResult(False, f"Error: {str(e)}")
     
+    def _commit_block_upload(
+        self,
+        pending_block: tuple,
+        file_name: str,
+        num_blocks: int,
+        block_entries: List[BlockEntry]
+    ) -> Optional[int]:
+        """
+        Espera los envíos de un bloque y, si ambos fueron bien, añade su
+        entrada a block_entries (para registrarlas todas al final).
+        
+        Args:
+            pending_block: (índice, block_id, nodo primario, nodo réplica,
+                           tamaño, hash, (futuro primario, futuro réplica))
+            file_name: Nombre del archivo al que pertenece el bloque
+            num_blocks: Total de bloques del archivo (para el progreso)
+            block_entries: Lista donde acumular las entradas confirmadas
+            
+        Returns:
+            None si el bloque quedó confirmado, o su block_id si falló algún envío
+        """
+        i, block_id, primary_node, replica_node, size, block_hash, futures = pending_block
+        success_primary, success_replica = (future.result() for future in futures)
+        
+        if not success_primary or not success_replica:
+            print(f"\n❌ Fallo en envío del bloque {block_id}: "
+                  f"primario={success_primary}, réplica={success_replica}")
+            return block_id
+        
+        block_entries.append(BlockEntry(
+            block_id=block_id,
+            estado='ocupado',
+            archivo=file_name,
+            parte=i,
+            nodo_primario=primary_node,
+            nodo_replica=replica_node,
+            tamaño_bytes=size,
+            hash=block_hash
+        ))
+        
+        if _progress_changed(i + 1, num_blocks):
+            progress = ((i + 1) / num_blocks) * 100
+            print(f"   [{progress:5.1f}%] Bloque {i+1}/{num_blocks} → "
+                  f"Nodo {primary_node} (primario), Nodo {replica_node} (réplica)")
+        return None
+    
     def _send_block_to_node(
         self,
         block_id: int,
@@ -325,16 +453,28 @@ class FileOperations:
             True si se envió correctamente
         """
         try:
+            data = {
+                'block_id': block_id,
+                'file_name': file_name,
+                'hash': block_hash,
+                'size': len(block_data)
+            }
+            payload = block_data  # Datos en binario, tras el JSON
+            
+            # Comprimir si está activado y se gana espacio (datos ya
+            # comprimidos o aleatorios no se reducen). El hash sigue siendo
+            # del bloque original: el receptor lo verifica al descomprimir
+            if self.wire_compression != CONTENT_ENCODING_RAW:
+                compressed = compress_payload(block_data, self.wire_compression)
+                if len(compressed) < len(block_data):
+                    data['content_encoding'] = self.wire_compression
+                    payload = compressed
+            
             message = NetworkMessage(
                 NetworkMessage.UPLOAD_BLOCK,
-                {
-                    'block_id': block_id,
-                    'file_name': file_name,
-                    'data': block_data.hex(),  # Convertir a hex para JSON
-                    'hash': block_hash,
-                    'size': len(block_data)
-                },
-                self.coordinator_id
+                data,
+                self.coordinator_id,
+                payload=payload
             )
             
             response = self.network.send_message_to_node(
@@ -360,39 +500,37 @@ class FileOperations:
     def _rollback_upload(
         self,
         assignments: List[tuple],
-        file_name: str
+        file_name: str,
+        reserved_blocks: List[int]
     ) -> None:
         """
         Revierte una subida fallida eliminando bloques ya enviados.
         
+        Los bloques solo se registran en los metadatos cuando toda la subida
+        ha ido bien: aquí solo se devuelve su reserva.
+        
         Args:
             assignments: Lista de (block_id, primary_node, replica_node)
             file_name: Nombre del archivo
+            reserved_blocks: IDs reservados para la subida
         """
         print("⚠️ Realizando rollback...")
         
         for block_id, primary_node, replica_node in assignments:
             # Intentar eliminar de nodo primario
-            primary_config = self.config.get_node_by_id(primary_node)
             self._delete_block_from_node(
                 block_id,
-                primary_config['ip'],
-                primary_config['puerto']
+                *self.config.get_node_address(primary_node)
             )
             
             # Intentar eliminar de nodo réplica
-            replica_config = self.config.get_node_by_id(replica_node)
             self._delete_block_from_node(
                 block_id,
-                replica_config['ip'],
-                replica_config['puerto']
+                *self.config.get_node_address(replica_node)
             )
-            
-            # Liberar bloque en metadatos
-            try:
-                self.metadata.free_block(block_id)
-            except:
-                pass
+        
+        # Devolver la reserva cuando los nodos ya no guardan esos bloques
+        self.metadata.release_blocks(reserved_blocks)
     
     # ========================================================================
     # Operación: DOWNLOAD (Descargar archivo)
@@ -448,63 +586,70 @@ class FileOperations:
             print(f"   ✓ Tamaño: {file_metadata.tamaño_total:,} bytes")
             print(f"   ✓ Bloques: {file_metadata.num_bloques}")
             
-            # Paso 2: Recuperar bloques desde nodos
-            print("📡 Recuperando bloques desde nodos...")
-            
-            blocks_data = []
-            
-            for i, block_id in enumerate(file_metadata.bloques):
-                # Obtener información del bloque
-                block_entry = self.metadata.get_block_entry(block_id)
-                
-                # Intentar desde nodo primario
-                block_data = self._retrieve_block_from_node(
-                    block_id,
-                    block_entry.nodo_primario,
-                    active_nodes
-                )
-                
-                # Si falla, intentar desde réplica
-                if not block_data and block_entry.nodo_replica:
-                    block_data = self._retrieve_block_from_node(
-                        block_id,
-                        block_entry.nodo_replica,
-                        active_nodes
-                    )
-                
-                if not block_data:
-                    return FileOperationResult(
-                        False,
-                        f"No se pudo recuperar bloque {block_id}"
-                    )
-                
-                # Verificar hash del bloque
-                block_hash = self.block_manager._calculate_hash(block_data)
-                if block_hash != block_entry.hash:
-                    return FileOperationResult(
-                        False,
-                        f"Hash incorrecto en bloque {block_id} (corrupto)"
-                    )
+            # Pasos 2 y 3: Recuperar bloques y reconstruir el archivo. Se
+            # piden hasta DOWNLOAD_WINDOW_BLOCKS bloques a la vez y se
+            # escriben en orden según van llegando (los de la ventana son
+            # los únicos en memoria)
+            print("📡 Recuperando bloques y reconstruyendo archivo...")
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            num_blocks = file_metadata.num_bloques
+            error = None
+            
+            # Hash del archivo reconstruido, calculado mientras se escribe
+            file_hasher = hashlib.sha256()
+            
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WINDOW_BLOCKS,
+                                    thread_name_prefix="download") as executor, \
+                    open(output_path, 'wb', buffering=0) as f:
+                pending = deque()
+                block_ids = iter(file_metadata.bloques)
+                written_blocks = 0
                 
-                blocks_data.append(block_data)
+                while written_blocks < num_blocks:
+                    # Mantener la ventana llena
+                    for block_id in block_ids:
+                        pending.append(executor.submit(
+                            self._fetch_verified_block, block_id, active_nodes
+                        ))
+                        if len(pending) >= DOWNLOAD_WINDOW_BLOCKS:
+                            break
+                    
+                    # Esperar al siguiente bloque y juntar con él los que ya
+                    # hayan llegado a continuación: se escriben en una sola
+                    # llamada al sistema
+                    try:
+                        batch = [pending.popleft().result()]
+                        while pending and pending[0].done():
+                            batch.append(pending.popleft().result())
+                    except ValueError as e:
+                        error = str(e)
+                        break
+                    
+                    blocks = [block_data for block_data, _ in batch]
+                    _write_blocks(f, blocks)
+                    for block_data in blocks:
+                        file_hasher.update(block_data)
+                    
+                    for _, node_id in batch:
+                        written_blocks += 1
+                        if _progress_changed(written_blocks, num_blocks):
+                            progress = (written_blocks / num_blocks) * 100
+                            print(f"   [{progress:5.1f}%] Bloque {written_blocks}/{num_blocks} "
+                                  f"recuperado desde Nodo {node_id}")
                 
-                progress = ((i + 1) / file_metadata.num_bloques) * 100
-                print(f"   [{progress:5.1f}%] Bloque {i+1}/{file_metadata.num_bloques} "
-                      f"recuperado desde Nodo {block_entry.nodo_primario}")
+                # Ante un fallo, no iniciar las peticiones pendientes
+                for future in pending:
+                    future.cancel()
             
-            # Paso 3: Reconstruir archivo
-            print("🔨 Reconstruyendo archivo...")
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_path, 'wb') as f:
-                for block_data in blocks_data:
-                    f.write(block_data)
+            if error is not None:
+                output_path.unlink()  # Eliminar archivo incompleto
+                return FileOperationResult(False, error)
             
             print(f"   ✓ Archivo escrito en: {output_path}")
             
             # Paso 4: Verificar integridad
             print("🔐 Verificando integridad...")
-            downloaded_hash = self.block_manager.calculate_hash(str(output_path))
+            downloaded_hash = file_hasher.hexdigest()
             
             if downloaded_hash != file_metadata.hash_completo:
                 output_path.unlink()  # Eliminar archivo corrupto
@@ -534,6 +679,45 @@ class FileOperations:
             self.logger.error(f"Error al descargar archivo: {e}")
             return FileOperationResult(False, f"Error: {str(e)}")
     
+    def _fetch_verified_block(
+        self,
+        block_id: int,
+        active_nodes: List[int]
+    ) -> Tuple[bytes, int]:
+        """
+        Recupera un bloque (del primario o, si falla, de la réplica) y
+        verifica su hash.
+        
+        Args:
+            block_id: ID del bloque
+            active_nodes: Lista de nodos activos
+            
+        Returns:
+            Tupla (datos del bloque, ID del nodo que lo sirvió)
+            
+        Raises:
+            ValueError: Si no se pudo recuperar o el hash no coincide
+        """
+        block_entry = self.metadata.get_block_entry(block_id)
+        
+        # Intentar desde nodo primario
+        node_id = block_entry.nodo_primario
+        block_data = self._retrieve_block_from_node(block_id, node_id, active_nodes)
+        
+        # Si falla, intentar desde réplica
+        if not block_data and block_entry.nodo_replica:
+            node_id = block_entry.nodo_replica
+            block_data = self._retrieve_block_from_node(block_id, node_id, active_nodes)
+        
+        if not block_data:
+            raise ValueError(f"No se pudo recuperar bloque {block_id}")
+        
+        # Verificar hash del bloque
+        if self.block_manager._calculate_hash(block_data) != block_entry.hash:
+            raise ValueError(f"Hash incorrecto en bloque {block_id} (corrupto)")
+        
+        return block_data, node_id
+    
     def _retrieve_block_from_node(
         self,
         block_id: int,
@@ -556,7 +740,7 @@ class FileOperations:
             return None
         
         try:
-            node_config = self.config.get_node_by_id(node_id)
+            node_ip, node_port = self.config.get_node_address(node_id)
             
             message = NetworkMessage(
                 NetworkMessage.DOWNLOAD_BLOCK,
@@ -565,13 +749,15 @@ class FileOperations:
             )
             
             response = self.network.send_message_to_node(
-                node_config['ip'],
-                node_config['puerto'],
+                node_ip,
+                node_port,
                 message
             )
             
             if response and response.type != NetworkMessage.ERROR:
-                # Convertir hex de vuelta a bytes
+                if response.payload is not None:
+                    return response.payload
+                # Nodos con el formato anterior envían los datos en hex
                 return bytes.fromhex(response.data.get('data', ''))
             
             return None
@@ -622,41 +808,37 @@ class FileOperations:
             
             print(f"   ✓ Bloques a eliminar: {file_metadata.num_bloques}")
             
-            # Paso 2: Eliminar bloques de nodos
+            # Paso 2: Eliminar bloques de nodos. Las peticiones (primario y
+            # réplica de cada bloque) se lanzan todas a la vez
             print("🗑️  Eliminando bloques de nodos...")
             
+            num_blocks = file_metadata.num_bloques
             deleted_count = 0
             
-            for i, block_id in enumerate(file_metadata.bloques):
-                block_entry = self.metadata.get_block_entry(block_id)
-                
-                # Eliminar de nodo primario
-                if block_entry.nodo_primario:
-                    primary_config = self.config.get_node_by_id(block_entry.nodo_primario)
-                    if self._delete_block_from_node(
-                        block_id,
-                        primary_config['ip'],
-                        primary_config['puerto']
-                    ):
-                        deleted_count += 1
-                
-                # Eliminar de nodo réplica
-                if block_entry.nodo_replica:
-                    replica_config = self.config.get_node_by_id(block_entry.nodo_replica)
-                    if self._delete_block_from_node(
-                        block_id,
-                        replica_config['ip'],
-                        replica_config['puerto']
-                    ):
-                        deleted_count += 1
+            with ThreadPoolExecutor(max_workers=DELETE_PARALLEL_REQUESTS,
+                                    thread_name_prefix="delete") as executor:
+                block_futures = []
+                for block_id in file_metadata.bloques:
+                    block_entry = self.metadata.get_block_entry(block_id)
+                    block_futures.append([
+                        executor.submit(
+                            self._delete_block_from_node,
+                            block_id,
+                            *self.config.get_node_address(node_id)
+                        )
+                        for node_id in (block_entry.nodo_primario, block_entry.nodo_replica)
+                        if node_id
+                    ])
                 
-                # Liberar bloque en metadatos
-                self.metadata.free_block(block_id)
-                
-                progress = ((i + 1) / file_metadata.num_bloques) * 100
-                print(f"   [{progress:5.1f}%] Bloque {i+1}/{file_metadata.num_bloques} eliminado")
-            
-            # Paso 3: Eliminar archivo de metadatos
+                for i, futures in enumerate(block_futures):
+                    deleted_count += sum(1 for future in futures if future.result())
+                    
+                    if _progress_changed(i + 1, num_blocks):
+                        progress = ((i + 1) / num_blocks) * 100
+                        print(f"   [{progress:5.1f}%] Bloque {i+1}/{num_blocks} eliminado")
+            
+            # Paso 3: Eliminar archivo de metadatos (libera todos sus bloques
+            # con una sola escritura a disco)
             print("💾 Eliminando registro del archivo...")
             self.metadata.delete_file(file_name)
             
@@ -726,7 +908,9 @@ class FileOperations:
             FileOperationResult con lista de archivos
         """
         try:
-            files = self.metadata.list_all_files()
+            # Todos los metadatos de una vez (un solo acceso con el lock),
+            # en lugar de una consulta por archivo
+            files = self.metadata.list_files()
             
             if not files:
                 return FileOperationResult(
@@ -735,17 +919,17 @@ class FileOperations:
                     {'files': []}
                 )
             
-            files_info = []
-            for file_name in files:
-                metadata = self.metadata.get_file_metadata(file_name)
-                files_info.append({
+            files_info = [
+                {
                     'nombre': metadata.nombre,
                     'tamaño': metadata.tamaño_total,
                     'tamaño_mb': metadata.tamaño_total / (1024 * 1024),
                     'num_bloques': metadata.num_bloques,
                     'fecha_subida': metadata.fecha_subida,
                     'hash': metadata.hash_completo
-                })
+                }
+                for metadata in files
+            ]
             
             return FileOperationResult(
                 True,
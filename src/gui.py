@@ -14,13 +14,62 @@ Fecha: Noviembre 2025
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from typing import Optional, List
-from datetime import datetime
-import threading
+from typing import Dict, Optional, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
 
 from src.file_operations import FileOperations, FileOperationResult
 
 
+# Altura (px) de cada fila en la tabla de bloques
+BLOCK_TABLE_ROW_HEIGHT = 22
+
+# Filas de la tabla de archivos ya formateadas que se recuerdan (LRU)
+FILE_ROW_CACHE_SIZE = 1024
+
+# Bloques que se añaden de cada vez en la ventana de atributos
+ATTR_BLOCKS_PER_PAGE = 200
+
+# Intervalo (ms) de animación de la barra de progreso (~30 Hz)
+PROGRESS_TICK_MS = 33
+
+# Threads compartidos para el trabajo en segundo plano de la GUI (subidas,
+# descargas y lista de archivos); se dejan núcleos libres para Tk y la red
+GUI_WORKER_THREADS = max(2, (os.cpu_count() or 1) - 3)
+
+# Plantilla de cada bloque en la ventana de atributos
+BLOCK_ATTRIBUTES_TEMPLATE = """
+Bloque {number} (ID: {block_id}):
+  └─ Nodo primario: {primary}
+  └─ Nodo réplica:  {replica}
+  └─ Tamaño:        {size:,} bytes
+  └─ Hash:          {hash}...
+"""
+
+
+def _format_block_attributes(index: int, block_info: dict) -> str:
+    """
+    Formatea la descripción de un bloque para la ventana de atributos.
+    
+    Args:
+        index: Posición del bloque dentro del archivo (desde 0)
+        block_info: Diccionario con información del bloque
+    
+    Returns:
+        Texto del bloque listo para insertar
+    """
+    return BLOCK_ATTRIBUTES_TEMPLATE.format(
+        number=index + 1,
+        block_id=block_info['block_id'],
+        primary=block_info['nodo_primario'],
+        replica=block_info['nodo_replica'],
+        size=block_info['tamaño'],
+        hash=block_info['hash'][:32]
+    )
+
+
 class SADTFGUI:
     """
     Interfaz gráfica principal del sistema SADTF.
@@ -50,6 +99,34 @@ class SADTFGUI:
         # Todos los nodos pueden usar FileOperations para operar con el coordinador
         self.file_ops = FileOperations(coordinator_node_id)
         
+        # Tabla de archivos: filas mostradas (iid = nombre del archivo ->
+        # valores) y caché LRU de filas formateadas, por (nombre, fecha, tamaño)
+        self._shown_file_rows: Dict[str, tuple] = {}
+        self._file_row_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Número de la última petición de lista de archivos: si se solapan
+        # dos refrescos, solo se aplica el resultado del más reciente
+        self._file_list_request = 0
+        
+        # Fila provisional "Cargando…" mientras llega la primera lista
+        self._loading_row: Optional[str] = None
+        
+        # Ventana de progreso: se crea la primera vez y luego solo se
+        # muestra y oculta entre operaciones
+        self.progress_window: Optional[tk.Toplevel] = None
+        self._progress_label: Optional[tk.Label] = None
+        self._progress_bar: Optional[ttk.Progressbar] = None
+        
+        # Atributos ya consultados: nombre -> (versión de metadatos, info).
+        # Mientras los metadatos no cambien se reutilizan sin recalcularlos
+        self._attr_cache: Dict[str, tuple] = {}
+        
+        # Pool de threads para no crear uno nuevo por cada operación
+        self._pool = ThreadPoolExecutor(
+            max_workers=GUI_WORKER_THREADS,
+            thread_name_prefix="gui"
+        )
+        
         # Crear ventana principal
         self.root = tk.Tk()
         self.root.title("SADTF")
@@ -62,8 +139,13 @@ class SADTFGUI:
         # Crear widgets
         self._create_widgets()
         
-        # Cargar archivos iniciales
-        self._refresh_file_list()
+        # Cargar archivos iniciales cuando la ventana ya se haya mostrado;
+        # mientras tanto la tabla muestra una fila "Cargando…"
+        self.tree.tag_configure("cargando", foreground="gray")
+        self._loading_row = self.tree.insert(
+            "", "end", values=("Cargando…", "", ""), tags=("cargando",)
+        )
+        self.root.after(50, self._refresh_file_list)
     
     def _setup_style(self):
         """Configura el estilo visual de la interfaz."""
@@ -93,6 +175,10 @@ class SADTFGUI:
             font=('Arial', 10, 'bold')
         )
         style.map('Files.Treeview', background=[('selected', '#0078D7')])
+        
+        # Tabla de bloques: altura de fila fija, para saber cuántas filas
+        # caben en pantalla (ver _show_block_table)
+        style.configure("Blocks.Treeview", rowheight=BLOCK_TABLE_ROW_HEIGHT)
     
     def _create_widgets(self):
         """Crea todos los widgets de la interfaz."""
@@ -201,38 +287,97 @@ class SADTFGUI:
     # ========================================================================
     
     def _refresh_file_list(self):
-        """Actualiza la lista de archivos en la tabla."""
-        # Limpiar tabla actual
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """
+        Actualiza la lista de archivos en la tabla.
         
-        # Obtener lista de archivos
+        La lista se obtiene en el pool de threads (lee metadatos) y la tabla
+        se actualiza después en el thread de Tk, así la ventana no se
+        congela mientras tanto.
+        """
+        self._file_list_request += 1
+        self._pool.submit(self._list_files_thread, self._file_list_request)
+    
+    def _list_files_thread(self, request: int):
+        """Thread para obtener la lista de archivos sin bloquear la GUI."""
         result = self.file_ops.list_files()
         
-        if not result.success:
+        # Actualizar GUI en main thread
+        self.root.after(0, self._apply_file_list, request, result)
+    
+    def _apply_file_list(self, request: int, result: FileOperationResult):
+        """
+        Muestra en la tabla una lista de archivos ya obtenida.
+        
+        Solo toca las filas que cambiaron: se eliminan las de archivos que
+        ya no están (o cuyos datos cambiaron) y se insertan las nuevas. Si la
+        lista no cambió no se hace ninguna llamada a Tk.
+        
+        Args:
+            request: Número de petición (se descarta si ya hay una posterior)
+            result: Resultado de FileOperations.list_files
+        """
+        if request != self._file_list_request:
             return
         
-        files = result.data.get('files', [])
+        if self._loading_row is not None:
+            self.tree.delete(self._loading_row)
+            self._loading_row = None
         
-        # Agregar archivos a la tabla
-        for file_info in files:
-            nombre = file_info['nombre']
-            
-            # Formatear fecha: DD/MM/YYYY
-            fecha_iso = file_info['fecha_subida']
-            try:
-                fecha_obj = datetime.fromisoformat(fecha_iso)
-                fecha = fecha_obj.strftime("%d/%m/%Y")
-            except:
-                fecha = fecha_iso[:10]  # Fallback
-            
-            # Formatear tamaño en KB
-            tamaño_bytes = file_info['tamaño']
-            tamaño_kb = int(tamaño_bytes / 1024)
-            tamaño = f"{tamaño_kb} KB"
+        if not result.success:
+            rows = {}
+        else:
+            rows = {
+                file_info['nombre']: self._format_file_row(file_info)
+                for file_info in result.data.get('files', [])
+            }
+        
+        # Eliminar filas que desaparecieron o cambiaron
+        for nombre, values in list(self._shown_file_rows.items()):
+            if rows.get(nombre) != values:
+                self.tree.delete(nombre)
+                del self._shown_file_rows[nombre]
+        
+        # Agregar archivos nuevos a la tabla (iid = nombre del archivo)
+        for nombre, values in rows.items():
+            if nombre not in self._shown_file_rows:
+                self.tree.insert("", "end", iid=nombre, values=values)
+                self._shown_file_rows[nombre] = values
+    
+    def _format_file_row(self, file_info: dict) -> tuple:
+        """
+        Formatea los valores de una fila de la tabla de archivos.
+        
+        Args:
+            file_info: Datos del archivo (de FileOperations.list_files)
             
-            # Insertar en tabla
-            self.tree.insert("", "end", values=(nombre, fecha, tamaño))
+        Returns:
+            Tupla (nombre, fecha DD/MM/YYYY, tamaño en KB)
+        """
+        nombre = file_info['nombre']
+        fecha_iso = file_info['fecha_subida']
+        tamaño_bytes = file_info['tamaño']
+        
+        key = (nombre, fecha_iso, tamaño_bytes)
+        values = self._file_row_cache.get(key)
+        if values is not None:
+            self._file_row_cache.move_to_end(key)
+            return values
+        
+        # Formatear fecha: DD/MM/YYYY. La fecha siempre es ISO
+        # (YYYY-MM-DD...), basta con reordenar los trozos sin parsearla
+        if len(fecha_iso) >= 10 and fecha_iso[4] == '-' and fecha_iso[7] == '-':
+            fecha = f"{fecha_iso[8:10]}/{fecha_iso[5:7]}/{fecha_iso[0:4]}"
+        else:
+            fecha = fecha_iso[:10]  # Fallback
+        
+        # Formatear tamaño en KB
+        tamaño = f"{tamaño_bytes >> 10} KB"
+        
+        values = (nombre, fecha, tamaño)
+        self._file_row_cache[key] = values
+        if len(self._file_row_cache) > FILE_ROW_CACHE_SIZE:
+            self._file_row_cache.popitem(last=False)
+        return values
     
     def _get_selected_file(self) -> Optional[str]:
         """
@@ -242,11 +387,12 @@ class SADTFGUI:
             Nombre del archivo o None si no hay selección
         """
         selection = self.tree.selection()
-        if not selection:
+        if not selection or selection[0] == self._loading_row:
             return None
         
-        item = self.tree.item(selection[0])
-        return item['values'][0]  # Columna "nombre"
+        # El iid de cada fila es el nombre del archivo (tal cual: los
+        # valores de la fila vuelven de Tk convertidos, p. ej. "123" -> 123)
+        return selection[0]
     
     # ========================================================================
     # Handlers de botones
@@ -266,12 +412,8 @@ class SADTFGUI:
         # Mostrar ventana de progreso
         self._show_progress_window("Cargando archivo...")
         
-        # Ejecutar upload en thread separado
-        thread = threading.Thread(
-            target=self._upload_file_thread,
-            args=(file_path,)
-        )
-        thread.start()
+        # Ejecutar upload en el pool de threads
+        self._pool.submit(self._upload_file_thread, file_path)
     
     def _upload_file_thread(self, file_path: str):
         """Thread para subir archivo sin bloquear la GUI."""
@@ -287,6 +429,7 @@ class SADTFGUI:
         self._close_progress_window()
         
         if result.success:
+            self._attr_cache.clear()
             messagebox.showinfo("Éxito", result.message)
             self._refresh_file_list()
         else:
@@ -317,12 +460,8 @@ class SADTFGUI:
         # Mostrar ventana de progreso
         self._show_progress_window("Descargando archivo...")
         
-        # Ejecutar download en thread separado
-        thread = threading.Thread(
-            target=self._download_file_thread,
-            args=(file_name, output_path)
-        )
-        thread.start()
+        # Ejecutar download en el pool de threads
+        self._pool.submit(self._download_file_thread, file_name, output_path)
     
     def _download_file_thread(self, file_name: str, output_path: str):
         """Thread para descargar archivo sin bloquear la GUI."""
@@ -353,23 +492,56 @@ class SADTFGUI:
             )
             return
         
-        # Obtener información del archivo
-        result = self.file_ops.get_file_info(file_name)
-        
-        if not result.success:
-            messagebox.showerror("Error", result.message)
-            return
+        # Obtener información del archivo (de la caché si los metadatos no
+        # han cambiado; la versión se lee antes de consultar)
+        version = self.file_ops.metadata.version
+        cached = self._attr_cache.get(file_name)
+        if cached is not None and cached[0] == version:
+            file_info = cached[1]
+        else:
+            result = self.file_ops.get_file_info(file_name)
+            
+            if not result.success:
+                messagebox.showerror("Error", result.message)
+                return
+            
+            file_info = result.data
+            self._attr_cache[file_name] = (version, file_info)
         
         # Mostrar ventana con atributos
-        self._show_file_attributes(result.data)
+        self._show_file_attributes(file_info)
     
     def _btn_tabla_clicked(self):
         """Handler para botón Tabla."""
-        # Obtener estadísticas y tabla de bloques
+        # Mostrar ventana de progreso
+        self._show_progress_window("Cargando tabla de bloques...")
+        
+        # Obtener estadísticas y tabla de bloques en el pool de threads
+        self._pool.submit(self._block_table_thread)
+    
+    def _block_table_thread(self):
+        """Thread para leer estadísticas y bloques sin bloquear la GUI."""
         stats = self.file_ops.get_system_statistics()
         
+        # Filas a mostrar: los primeros 100 bloques y, a partir de ahí,
+        # solo los ocupados
+        rows = []
+        max_entries = 100
+        
+        for block_id, entry in self.file_ops.metadata.iter_blocks():
+            if len(rows) >= max_entries and entry.estado == 'libre':
+                continue
+            rows.append((block_id, entry))
+        
+        # Actualizar GUI en main thread
+        self.root.after(0, self._block_table_complete, stats, rows)
+    
+    def _block_table_complete(self, stats: dict, rows: List[tuple]):
+        """Callback cuando se terminó de leer la tabla de bloques."""
+        self._close_progress_window()
+        
         # Mostrar ventana con tabla de bloques
-        self._show_block_table(stats)
+        self._show_block_table(stats, rows)
     
     # ========================================================================
     # Ventanas secundarias
@@ -412,20 +584,40 @@ DISTRIBUCIÓN DE BLOQUES:
             height=20
         )
         text_area.pack(fill=tk.BOTH, expand=True)
-        text_area.insert('1.0', info_text)
-        
-        # Agregar información de cada bloque
-        for i, block_info in enumerate(file_info['bloques']):
-            block_text = f"""
-Bloque {i+1} (ID: {block_info['block_id']}):
-  └─ Nodo primario: {block_info['nodo_primario']}
-  └─ Nodo réplica:  {block_info['nodo_replica']}
-  └─ Tamaño:        {block_info['tamaño']:,} bytes
-  └─ Hash:          {block_info['hash'][:32]}...
-"""
-            text_area.insert(tk.END, block_text)
         
-        text_area.config(state='disabled')  # Solo lectura
+        # Los bloques se añaden por páginas: al abrir solo la primera y la
+        # siguiente cuando el scroll llega al final, así abrir la ventana
+        # cuesta lo mismo con 10 bloques que con 10k
+        blocks = file_info['bloques']
+        next_block = [0]
+        append_pending = [False]
+        
+        def page_text() -> str:
+            start = next_block[0]
+            end = min(start + ATTR_BLOCKS_PER_PAGE, len(blocks))
+            next_block[0] = end
+            return "".join(
+                _format_block_attributes(i, blocks[i]) for i in range(start, end)
+            )
+        
+        def append_page() -> None:
+            append_pending[0] = False
+            if next_block[0] >= len(blocks) or not text_area.winfo_exists():
+                return
+            text_area.config(state='normal')
+            text_area.insert(tk.END, page_text())
+            text_area.config(state='disabled')
+        
+        def on_yview(first: str, last: str) -> None:
+            text_area.vbar.set(first, last)
+            if (float(last) >= 1.0 and next_block[0] < len(blocks)
+                    and not append_pending[0]):
+                append_pending[0] = True
+                text_area.after_idle(append_page)
+        
+        # Un solo insert con la cabecera y la primera página de bloques
+        text_area.insert('1.0', info_text + page_text())
+        text_area.config(state='disabled', yscrollcommand=on_yview)  # Solo lectura
         
         # Botón cerrar
         btn_close = tk.Button(
@@ -439,12 +631,13 @@ Bloque {i+1} (ID: {block_info['block_id']}):
         )
         btn_close.pack(pady=10)
     
-    def _show_block_table(self, stats: dict):
+    def _show_block_table(self, stats: dict, rows: List[tuple]):
         """
         Muestra ventana con tabla completa de bloques del sistema.
         
         Args:
             stats: Estadísticas del sistema
+            rows: Filas (block_id, BlockEntry) a mostrar, en orden
         """
         window = tk.Toplevel(self.root)
         window.title("Tabla de Bloques del Sistema")
@@ -482,7 +675,8 @@ Bloque {i+1} (ID: {block_info['block_id']}):
         
         # Crear Treeview para bloques
         columns = ("id", "estado", "archivo", "parte", "nodo1", "nodo2")
-        tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings",
+                            style="Blocks.Treeview")
         
         # Configurar encabezados con mejor descripción
         tree.heading("id", text="Bloque ID")
@@ -500,56 +694,49 @@ Bloque {i+1} (ID: {block_info['block_id']}):
         tree.column("nodo1", width=120, anchor="center")
         tree.column("nodo2", width=120, anchor="center")
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        # Tabla virtual: el Treeview solo contiene las filas visibles. El
+        # scrollbar se maneja a mano sobre la lista completa, así abrir la
+        # ventana o desplazarse cuesta lo mismo con 100 bloques que con 10k
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical")
+        first_row = [0]
         
-        # Obtener tabla de bloques desde metadata
-        metadata = self.file_ops.metadata
+        def visible_rows() -> int:
+            # La cabecera ocupa aproximadamente una fila
+            return max(1, tree.winfo_height() // BLOCK_TABLE_ROW_HEIGHT - 1)
         
-        # Insertar datos (mostrando máximo 100 bloques ocupados + algunos libres)
-        count = 0
-        max_entries = 100
-        
-        for block_id, entry in sorted(metadata.block_table.items()):
-            if count >= max_entries and entry.estado == 'libre':
-                continue
+        def render(first: int) -> None:
+            count = visible_rows()
+            first = max(0, min(first, len(rows) - count))
+            first_row[0] = first
             
-            archivo = entry.archivo if entry.archivo else "-"
-            parte = str(entry.parte) if entry.parte is not None else "-"
+            tree.delete(*tree.get_children())
+            for block_id, entry in rows[first:first + count]:
+                tree.insert("", "end", values=self._format_block_row(block_id, entry))
             
-            # Mostrar partición del nodo también
-            if entry.nodo_primario is not None:
-                # Calcular la partición (bloque % capacidad_nodo)
-                nodo_config = self.file_ops.config.get_node_by_id(entry.nodo_primario)
-                if nodo_config:
-                    particion_primaria = block_id % nodo_config['capacidad_mb']
-                    nodo1 = f"{entry.nodo_primario} [pos:{particion_primaria}]"
-                else:
-                    nodo1 = str(entry.nodo_primario)
+            if rows:
+                scrollbar.set(first / len(rows), min(1.0, (first + count) / len(rows)))
             else:
-                nodo1 = "-"
-            
-            if entry.nodo_replica is not None:
-                nodo_config = self.file_ops.config.get_node_by_id(entry.nodo_replica)
-                if nodo_config:
-                    particion_replica = block_id % nodo_config['capacidad_mb']
-                    nodo2 = f"{entry.nodo_replica} [pos:{particion_replica}]"
-                else:
-                    nodo2 = str(entry.nodo_replica)
+                scrollbar.set(0.0, 1.0)
+        
+        def on_scroll(action: str, amount: str, unit: str = "units") -> None:
+            if action == "moveto":
+                render(int(float(amount) * len(rows)))
             else:
-                nodo2 = "-"
-            
-            tree.insert("", "end", values=(
-                block_id,
-                entry.estado,
-                archivo,
-                parte,
-                nodo1,
-                nodo2
-            ))
-            
-            count += 1
+                step = visible_rows() if unit == "pages" else 1
+                render(first_row[0] + int(amount) * step)
+        
+        def on_mousewheel(event) -> str:
+            if event.num == 4 or event.delta > 0:
+                render(first_row[0] - 3)
+            else:
+                render(first_row[0] + 3)
+            return "break"
+        
+        scrollbar.configure(command=on_scroll)
+        tree.bind("<Configure>", lambda event: render(first_row[0]))
+        tree.bind("<MouseWheel>", on_mousewheel)
+        tree.bind("<Button-4>", on_mousewheel)
+        tree.bind("<Button-5>", on_mousewheel)
         
         # Empaquetar
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -567,42 +754,85 @@ Bloque {i+1} (ID: {block_info['block_id']}):
         )
         btn_close.pack(pady=10)
     
+    def _format_block_row(self, block_id: int, entry) -> tuple:
+        """
+        Construye los valores de una fila de la tabla de bloques.
+        
+        Args:
+            block_id: ID del bloque
+            entry: BlockEntry del bloque
+            
+        Returns:
+            Tupla (id, estado, archivo, parte, nodo primario, nodo réplica)
+        """
+        archivo = entry.archivo if entry.archivo else "-"
+        parte = str(entry.parte) if entry.parte is not None else "-"
+        
+        # Mostrar partición del nodo también
+        if entry.nodo_primario is not None:
+            # Calcular la partición (bloque % capacidad_nodo)
+            nodo_config = self.file_ops.config.get_node_by_id(entry.nodo_primario)
+            if nodo_config:
+                particion_primaria = block_id % nodo_config['capacidad_mb']
+                nodo1 = f"{entry.nodo_primario} [pos:{particion_primaria}]"
+            else:
+                nodo1 = str(entry.nodo_primario)
+        else:
+            nodo1 = "-"
+        
+        if entry.nodo_replica is not None:
+            nodo_config = self.file_ops.config.get_node_by_id(entry.nodo_replica)
+            if nodo_config:
+                particion_replica = block_id % nodo_config['capacidad_mb']
+                nodo2 = f"{entry.nodo_replica} [pos:{particion_replica}]"
+            else:
+                nodo2 = str(entry.nodo_replica)
+        else:
+            nodo2 = "-"
+        
+        return (block_id, entry.estado, archivo, parte, nodo1, nodo2)
+    
     # ========================================================================
     # Ventana de progreso
     # ========================================================================
     
     def _show_progress_window(self, message: str):
         """Muestra ventana modal de progreso."""
-        self.progress_window = tk.Toplevel(self.root)
-        self.progress_window.title("Procesando...")
-        self.progress_window.geometry("300x100")
-        self.progress_window.resizable(False, False)
+        if self.progress_window is None:
+            self.progress_window = tk.Toplevel(self.root)
+            self.progress_window.title("Procesando...")
+            self.progress_window.geometry("300x100")
+            self.progress_window.resizable(False, False)
+            self.progress_window.protocol("WM_DELETE_WINDOW", self._close_progress_window)
+            
+            # Centrar ventana
+            self.progress_window.transient(self.root)
+            
+            self._progress_label = tk.Label(
+                self.progress_window,
+                font=('Arial', 12)
+            )
+            self._progress_label.pack(expand=True)
+            
+            # Progress bar indeterminada
+            self._progress_bar = ttk.Progressbar(
+                self.progress_window,
+                mode='indeterminate',
+                length=250
+            )
+            self._progress_bar.pack(pady=10)
         
-        # Centrar ventana
-        self.progress_window.transient(self.root)
+        self._progress_label.config(text=message)
+        self.progress_window.deiconify()
         self.progress_window.grab_set()
-        
-        label = tk.Label(
-            self.progress_window,
-            text=message,
-            font=('Arial', 12)
-        )
-        label.pack(expand=True)
-        
-        # Progress bar indeterminada
-        progress = ttk.Progressbar(
-            self.progress_window,
-            mode='indeterminate',
-            length=250
-        )
-        progress.pack(pady=10)
-        progress.start(10)
+        self._progress_bar.start(PROGRESS_TICK_MS)
     
     def _close_progress_window(self):
-        """Cierra la ventana de progreso."""
-        if hasattr(self, 'progress_window'):
-            self.progress_window.destroy()
-            del self.progress_window
+        """Oculta la ventana de progreso (se reutiliza en la siguiente operación)."""
+        if self.progress_window is not None:
+            self._progress_bar.stop()
+            self.progress_window.grab_release()
+            self.progress_window.withdraw()
     
     # ========================================================================
     # Ejecución
@@ -610,7 +840,15 @@ Bloque {i+1} (ID: {block_info['block_id']}):
     
     def run(self):
         """Inicia el loop principal de la GUI."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Descartar lo que no empezó; lo que está en curso termina solo
+            # (cancel_futures solo existe desde Python 3.9)
+            if sys.version_info >= (3, 9):
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                self._pool.shutdown(wait=False)
 
 
 # ============================================================================
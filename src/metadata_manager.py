@@ -17,7 +17,7 @@ Fecha: Noviembre 2025
 import json
 import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass, asdict
 
@@ -97,6 +97,21 @@ class MetadataManager:
         # Índice de archivos: dict[nombre_archivo -> FileMetadata]
         self.file_index: Dict[str, FileMetadata] = {}
         
+        # Mapa de bloques libres (1 byte por block_id: 1 = libre) y cursor
+        # de asignación. Buscar libres es un bytearray.find() en C que
+        # continúa desde el último bloque asignado, sin recorrer la tabla.
+        self._free_map = bytearray()
+        self._next_free = 0
+        
+        # IDs de la tabla en orden. Los bloques solo se crean al inicializar
+        # o cargar, así que se calcula ahí una vez y no en cada recorrido
+        self._block_ids: List[int] = []
+        
+        # Contador de cambios: aumenta con cada modificación guardada, para
+        # que quien cachee datos derivados (p. ej. estadísticas) sepa si
+        # siguen vigentes
+        self.version = 0
+        
         # Lock para operaciones concurrentes
         self.lock = threading.Lock()
         
@@ -130,6 +145,8 @@ class MetadataManager:
                     estado='libre'
                 )
             self.file_index = {}
+            self._rebuild_free_map()
+            self._rebuild_block_ids()
             self._save_to_disk()
     
     def _load_from_disk(self) -> None:
@@ -148,11 +165,36 @@ class MetadataManager:
                 self.file_index = {
                     k: FileMetadata(**v) for k, v in data.items()
                 }
+            
+            self._rebuild_free_map()
+            self._rebuild_block_ids()
+    
+    def _rebuild_free_map(self) -> None:
+        """Reconstruye el mapa de bloques libres desde la tabla de bloques."""
+        # No necesita lock porque se llama desde funciones con lock
+        size = max(self.block_table, default=-1) + 1
+        self._free_map = bytearray(size)
+        for block_id, entry in self.block_table.items():
+            if entry.estado == 'libre':
+                self._free_map[block_id] = 1
+        self._next_free = 0
+    
+    def _rebuild_block_ids(self) -> None:
+        """Reconstruye la lista ordenada de IDs de la tabla de bloques."""
+        # No necesita lock porque se llama desde funciones con lock
+        if all(block_id in self.block_table for block_id in range(len(self.block_table))):
+            # IDs contiguos desde 0 (el caso normal): no hace falta ordenar
+            self._block_ids = list(range(len(self.block_table)))
+        else:
+            self._block_ids = sorted(self.block_table)
     
     def _save_to_disk(self) -> None:
         """Guarda metadatos en archivos JSON."""
         # No necesita lock porque se llama desde funciones con lock
         
+        # Toda modificación termina aquí: los datos en memoria ya cambiaron
+        self.version += 1
+        
         # Guardar tabla de bloques
         data = {
             str(k): asdict(v) for k, v in self.block_table.items()
@@ -175,6 +217,10 @@ class MetadataManager:
         """
         Obtiene una lista de bloques libres.
         
+        La búsqueda empieza después del último bloque asignado (y da la
+        vuelta al final de la tabla), así los bloques se reparten por toda
+        la tabla en lugar de reutilizar siempre los primeros.
+        
         Args:
             count: Cantidad de bloques necesarios
             
@@ -185,18 +231,81 @@ class MetadataManager:
             ValueError: Si no hay suficientes bloques libres
         """
         with self.lock:
-            free_blocks = [
-                block_id for block_id, entry in self.block_table.items()
-                if entry.estado == 'libre'
-            ]
-            
-            if len(free_blocks) < count:
-                raise ValueError(
-                    f"No hay suficientes bloques libres. "
-                    f"Necesarios: {count}, Disponibles: {len(free_blocks)}"
-                )
+            return self._find_free_blocks(count)
+    
+    def reserve_blocks(self, count: int) -> List[int]:
+        """
+        Obtiene bloques libres y los reserva para una subida en curso.
+        
+        Los bloques reservados dejan de aparecer como libres (otra subida
+        no los recibe), pero no se guardan en disco: se confirman con
+        allocate_blocks o se devuelven con release_blocks.
+        
+        Args:
+            count: Cantidad de bloques necesarios
             
-            return free_blocks[:count]
+        Returns:
+            Lista de IDs de bloques reservados
+            
+        Raises:
+            ValueError: Si no hay suficientes bloques libres
+        """
+        with self.lock:
+            free_blocks = self._find_free_blocks(count)
+            for block_id in free_blocks:
+                self._free_map[block_id] = 0
+            if free_blocks:
+                self._next_free = (free_blocks[-1] + 1) % len(self._free_map)
+            return free_blocks
+    
+    def release_blocks(self, block_ids: List[int]) -> None:
+        """
+        Devuelve bloques reservados con reserve_blocks que no se asignaron.
+        
+        Los bloques que ya se asignaron (estado 'ocupado') no se tocan.
+        
+        Args:
+            block_ids: IDs de los bloques reservados
+        """
+        with self.lock:
+            for block_id in block_ids:
+                entry = self.block_table.get(block_id)
+                if entry is not None and entry.estado == 'libre':
+                    self._free_map[block_id] = 1
+    
+    def _find_free_blocks(self, count: int) -> List[int]:
+        """
+        Busca bloques libres en el mapa de libres, desde el cursor.
+        
+        Args:
+            count: Cantidad de bloques necesarios
+            
+        Returns:
+            Lista de IDs de bloques libres
+            
+        Raises:
+            ValueError: Si no hay suficientes bloques libres
+        """
+        # No necesita lock porque se llama desde funciones con lock
+        free_map = self._free_map
+        available = free_map.count(1)
+        
+        if available < count:
+            raise ValueError(
+                f"No hay suficientes bloques libres. "
+                f"Necesarios: {count}, Disponibles: {available}"
+            )
+        
+        # Recorrer desde el cursor hasta el final y luego desde el inicio
+        free_blocks = []
+        start = self._next_free
+        for lo, hi in ((start, len(free_map)), (0, start)):
+            block_id = free_map.find(1, lo, hi)
+            while block_id != -1 and len(free_blocks) < count:
+                free_blocks.append(block_id)
+                block_id = free_map.find(1, block_id + 1, hi)
+        
+        return free_blocks
     
     def allocate_block(
         self,
@@ -256,6 +365,47 @@ class MetadataManager:
                 hash=block_hash,
                 fecha_creacion=datetime.now().isoformat()
             )
+            self._free_map[block_id] = 0
+            self._next_free = (block_id + 1) % len(self._free_map)
+            
+            self._save_to_disk()
+    
+    def allocate_blocks(self, entries: List[BlockEntry]) -> None:
+        """
+        Asigna varios bloques de una vez (p. ej. todos los de un archivo).
+        
+        Equivale a llamar a allocate_block por cada entrada, pero toma el
+        lock y guarda en disco una sola vez. Si algún bloque no existe o ya
+        está ocupado no se asigna ninguno. Sirve también para confirmar
+        bloques reservados con reserve_blocks.
+        
+        Args:
+            entries: Entradas de los bloques, con archivo, parte, nodos,
+                     tamaño y hash (el estado se marca como 'ocupado')
+            
+        Raises:
+            ValueError: Si algún bloque no existe o ya está ocupado
+        """
+        if not entries:
+            return
+        
+        fecha = datetime.now().isoformat()
+        
+        with self.lock:
+            for entry in entries:
+                if entry.block_id not in self.block_table:
+                    raise ValueError(f"Bloque {entry.block_id} no existe")
+                if self.block_table[entry.block_id].estado == 'ocupado':
+                    raise ValueError(f"Bloque {entry.block_id} ya está ocupado")
+            
+            for entry in entries:
+                entry.estado = 'ocupado'
+                if entry.fecha_creacion is None:
+                    entry.fecha_creacion = fecha
+                self.block_table[entry.block_id] = entry
+                self._free_map[entry.block_id] = 0
+            
+            self._next_free = (entries[-1].block_id + 1) % len(self._free_map)
             
             self._save_to_disk()
     
@@ -274,6 +424,7 @@ class MetadataManager:
                 block_id=block_id,
                 estado='libre'
             )
+            self._free_map[block_id] = 1
             
             self._save_to_disk()
     
@@ -368,6 +519,7 @@ class MetadataManager:
                         block_id=block_id,
                         estado='libre'
                     )
+                    self._free_map[block_id] = 1
             
             # Eliminar del índice
             del self.file_index[nombre]
@@ -475,6 +627,17 @@ class MetadataManager:
                 'total_size_mb': total_size / (1024 * 1024)
             }
     
+    def iter_blocks(self) -> Iterator[Tuple[int, BlockEntry]]:
+        """
+        Recorre la tabla de bloques ordenada por ID, sin volver a ordenarla.
+        
+        Yields:
+            Tuplas (block_id, BlockEntry)
+        """
+        block_table = self.block_table
+        for block_id in self._block_ids:
+            yield block_id, block_table[block_id]
+    
     def print_block_table(self, max_entries: int = 20) -> None:
         """
         Imprime la tabla de bloques.
@@ -490,7 +653,7 @@ class MetadataManager:
             print("-"*80)
             
             count = 0
-            for block_id, entry in sorted(self.block_table.items()):
+            for block_id, entry in self.iter_blocks():
                 if count >= max_entries and entry.estado == 'libre':
                     continue
                 
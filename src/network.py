@@ -14,14 +14,192 @@ Autor: Nerfe5
 Fecha: Noviembre 2025
 """
 
+import codecs
+import os
+import select
+import selectors
 import socket
+import sys
 import json
+import struct
 import threading
 import time
-from typing import Dict, Any, Optional, Tuple, Callable
+import zlib
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple, Callable
 from pathlib import Path
 import logging
 
+try:
+    # Opcional: compresión LZ4 del payload (más rápida que zlib)
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+# Tamaño de cada parte al recibir un payload por partes
+PAYLOAD_CHUNK_SIZE = 64 * 1024
+
+# Conexiones persistentes: el servidor cierra una conexión tras este tiempo
+# sin recibir mensajes; el cliente no reutiliza conexiones libres desde hace
+# más de POOL_IDLE_SECONDS (menos que el servidor, para no usar una que el
+# otro extremo está cerrando) y guarda como mucho POOL_MAX_IDLE por nodo
+KEEPALIVE_IDLE_SECONDS = 30.0
+POOL_IDLE_SECONDS = 10.0
+POOL_MAX_IDLE = 8
+
+# Codificaciones del payload ("content_encoding" en los datos del mensaje)
+CONTENT_ENCODING_RAW = "raw"
+SUPPORTED_CONTENT_ENCODINGS = (CONTENT_ENCODING_RAW, "zlib") + (
+    ("lz4",) if lz4 is not None else ()
+)
+
+
+def compress_payload(data, encoding: str) -> bytes:
+    """
+    Comprime un payload para enviarlo por la red.
+    
+    zlib usa nivel 1 (el más rápido): el objetivo es mover menos bytes,
+    no la máxima compresión.
+    
+    Args:
+        data: Datos a comprimir
+        encoding: "zlib" o "lz4"
+        
+    Returns:
+        Datos comprimidos
+        
+    Raises:
+        ValueError: Si la codificación no está soportada
+    """
+    if encoding == "zlib":
+        return zlib.compress(data, 1)
+    if encoding == "lz4" and lz4 is not None:
+        return lz4.frame.compress(data)
+    raise ValueError(f"Codificación de payload no soportada: {encoding}")
+
+
+def decompress_chunks(chunks: Iterator, encoding: str) -> Iterator[bytes]:
+    """
+    Descomprime un payload que llega por partes.
+    
+    Args:
+        chunks: Partes del payload comprimido
+        encoding: "zlib" o "lz4"
+        
+    Returns:
+        Iterador de partes descomprimidas
+        
+    Raises:
+        ValueError: Si la codificación no está soportada (se comprueba al
+                    llamar, antes de leer ninguna parte)
+    """
+    if encoding == "zlib":
+        decompressor = zlib.decompressobj()
+    elif encoding == "lz4" and lz4 is not None:
+        decompressor = lz4.frame.LZ4FrameDecompressor()
+    else:
+        raise ValueError(f"Codificación de payload no soportada: {encoding}")
+    
+    def generate() -> Iterator[bytes]:
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        if encoding == "zlib":
+            tail = decompressor.flush()
+            if tail:
+                yield tail
+    
+    return generate()
+
+
+def iter_console_commands(prompt: str, is_running: Callable[[], bool],
+                          poll_interval: float = 0.5) -> Iterator[str]:
+    """
+    Lee comandos de la consola sin quedarse bloqueado en input().
+    
+    stdin se registra en un selector y se consulta con timeout, de modo
+    que el bucle interactivo termina en cuanto is_running() devuelve False
+    (p. ej. si el coordinador/nodo se detiene por una señal) sin esperar a
+    que el usuario pulse Enter. El descriptor se lee directamente (no el
+    buffer de sys.stdin, que select no ve) y las líneas se separan aquí:
+    si llegan varias juntas se devuelven todas. En Windows (select solo
+    admite sockets) o si stdin no tiene descriptor se usa input() como
+    antes.
+    
+    Args:
+        prompt: Texto a mostrar antes de cada comando
+        is_running: Función que indica si se debe seguir leyendo
+        poll_interval: Segundos entre comprobaciones de is_running
+    
+    Yields:
+        Comandos en minúsculas y sin espacios alrededor
+    """
+    selector = None
+    if os.name != 'nt':
+        try:
+            fd = sys.stdin.fileno()
+            selector = selectors.DefaultSelector()
+            selector.register(fd, selectors.EVENT_READ)
+        except (ValueError, OSError, AttributeError):
+            if selector is not None:
+                selector.close()
+            selector = None
+    
+    # Texto leído que aún no forma una línea completa
+    decoder = codecs.getincrementaldecoder(sys.stdin.encoding or 'utf-8')(errors='replace')
+    pending = ''
+    
+    try:
+        while is_running():
+            print(prompt, end='', flush=True)
+            
+            if selector is None:
+                try:
+                    line = input()
+                except EOFError:
+                    return
+                yield line.strip().lower()
+                continue
+            
+            while '\n' not in pending:
+                try:
+                    ready = selector.select(poll_interval)
+                except OSError:
+                    # stdin no admite select: seguir con input()
+                    selector.close()
+                    selector = None
+                    break
+                if not is_running():
+                    return
+                if not ready:
+                    continue
+                data = os.read(fd, 4096)
+                if not data:
+                    # EOF: devolver lo que quedara sin salto de línea
+                    pending += decoder.decode(b'', final=True)
+                    if pending.strip():
+                        yield pending.strip().lower()
+                    return
+                pending += decoder.decode(data)
+            
+            if selector is None:
+                # Lo ya leído se devuelve antes de pasar a input()
+                line, pending = pending, ''
+                if not line:
+                    try:
+                        line = input()
+                    except EOFError:
+                        return
+                yield line.strip().lower()
+                continue
+            
+            line, pending = pending.split('\n', 1)
+            yield line.strip().lower()
+    finally:
+        if selector is not None:
+            selector.close()
+
 
 class NetworkMessage:
     """
@@ -34,11 +212,18 @@ class NetworkMessage:
         "sender": "nodo_id",
         "timestamp": 1234567890
     }
+    
+    Un mensaje puede llevar además un payload binario (p. ej. los datos de
+    un bloque). En ese caso el JSON incluye "payload_len" y los bytes se
+    envían en crudo justo después, sin codificarlos en hex dentro del JSON.
+    El payload puede ser también un archivo en disco (payload_file): se
+    envía con sendfile, sin cargarlo en memoria.
     """
     
     # Tipos de mensajes
     PING = "ping"
     PONG = "pong"
+    RING_HEARTBEAT = "ring_heartbeat"
     UPLOAD_BLOCK = "upload_block"
     DOWNLOAD_BLOCK = "download_block"
     DELETE_BLOCK = "delete_block"
@@ -50,7 +235,14 @@ class NetworkMessage:
     METADATA_UPDATE = "metadata_update"
     ERROR = "error"
     
-    def __init__(self, msg_type: str, data: Dict[str, Any], sender: int):
+    def __init__(
+        self,
+        msg_type: str,
+        data: Dict[str, Any],
+        sender: int,
+        payload: Optional[bytes] = None,
+        payload_file: Optional[Tuple[str, int]] = None
+    ):
         """
         Crea un nuevo mensaje de red.
         
@@ -58,28 +250,120 @@ class NetworkMessage:
             msg_type: Tipo de mensaje (usar constantes de clase)
             data: Datos del mensaje (diccionario)
             sender: ID del nodo que envía el mensaje
+            payload: Datos binarios opcionales que viajan tras el JSON
+            payload_file: (ruta, tamaño) de un archivo a enviar como payload,
+                          alternativa a payload
         """
         self.type = msg_type
         self.data = data
         self.sender = sender
         self.timestamp = int(time.time())
+        self.payload = payload
+        self.payload_file = payload_file
+        
+        # Al recibir con payload por partes (ver register_handler), iterador
+        # de las partes en lugar de payload
+        self.payload_chunks: Optional[Iterator[memoryview]] = None
+        
+        # Longitud del payload (al recibir, la anunciada en el JSON)
+        if payload is not None:
+            self.payload_len = len(payload)
+        elif payload_file is not None:
+            self.payload_len = payload_file[1]
+        else:
+            self.payload_len = 0
     
     def to_json(self) -> str:
         """Convierte el mensaje a JSON."""
-        return json.dumps({
+        obj = {
             "type": self.type,
             "data": self.data,
             "sender": self.sender,
             "timestamp": self.timestamp
-        })
+        }
+        if self.payload is not None:
+            obj["payload_len"] = len(self.payload)
+        elif self.payload_file is not None:
+            obj["payload_len"] = self.payload_file[1]
+        return json.dumps(obj)
     
     @classmethod
     def from_json(cls, json_str: str) -> 'NetworkMessage':
-        """Crea un mensaje desde JSON."""
+        """
+        Crea un mensaje desde JSON.
+        
+        El payload binario (si payload_len > 0) se lee aparte del socket.
+        """
         obj = json.loads(json_str)
         msg = cls(obj["type"], obj["data"], obj["sender"])
         msg.timestamp = obj["timestamp"]
+        msg.payload_len = obj.get("payload_len", 0)
         return msg
+    
+    # ========================================================================
+    # Formato compacto para STATUS_RESPONSE
+    # ========================================================================
+    
+    # node_id, total_blocks, used_blocks, free_blocks, usage_percentage*100,
+    # total_files, active_nodes; después, un uint32 por nodo de nodes_list
+    _STATUS_STRUCT = struct.Struct("<7I")
+    
+    @classmethod
+    def pack_status(cls, status: Dict[str, Any]) -> bytes:
+        """
+        Empaqueta los campos numéricos de un estado en binario.
+        
+        Se usa cuando el solicitante de GET_STATUS envía {"compact": True}:
+        los bytes viajan como payload binario de la respuesta (con
+        {"compact": True} como datos), unas decenas de bytes en lugar del
+        diccionario completo en JSON (útil para consultas periódicas).
+        
+        Args:
+            status: Estado con los campos de Coordinator._handle_get_status
+            
+        Returns:
+            Campos empaquetados
+        """
+        nodes_list = status['nodes_list']
+        packed = cls._STATUS_STRUCT.pack(
+            status['node_id'],
+            status['total_blocks'],
+            status['used_blocks'],
+            status['free_blocks'],
+            round(status['usage_percentage'] * 100),
+            status['total_files'],
+            status['active_nodes']
+        ) + struct.pack(f"<{len(nodes_list)}I", *nodes_list)
+        return packed
+    
+    @classmethod
+    def unpack_status(cls, raw: bytes) -> Dict[str, Any]:
+        """
+        Reconstruye el diccionario de estado a partir de pack_status().
+        
+        Args:
+            raw: Payload de un STATUS_RESPONSE compacto
+            
+        Returns:
+            Diccionario con los mismos campos numéricos que el formato JSON
+        """
+        header_size = cls._STATUS_STRUCT.size
+        (node_id, total_blocks, used_blocks, free_blocks, usage_x100,
+         total_files, active_nodes) = cls._STATUS_STRUCT.unpack_from(raw)
+        nodes_list = list(struct.unpack_from(
+            f"<{(len(raw) - header_size) // 4}I", raw, header_size
+        ))
+        return {
+            'status': 'online',
+            'node_id': node_id,
+            'total_blocks': total_blocks,
+            'used_blocks': used_blocks,
+            'free_blocks': free_blocks,
+            'usage_percentage': usage_x100 / 100,
+            'total_files': total_files,
+            'active_nodes': active_nodes,
+            'nodes_list': nodes_list
+        }
 
 
 class NetworkManager:
@@ -113,6 +397,22 @@ class NetworkManager:
         # Handlers para diferentes tipos de mensajes
         self.message_handlers: Dict[str, Callable] = {}
         
+        # Tipos cuyo payload el handler recibe por partes
+        self._stream_payload_types: Set[str] = set()
+        
+        # Tareas periódicas que corre el propio loop del servidor:
+        # [próxima ejecución (monotonic), intervalo, función]
+        self._periodic_tasks: List[list] = []
+        
+        # Conexiones cliente libres para reutilizar, por (ip, puerto):
+        # lista de (socket, instante en que quedó libre)
+        self._idle_connections: Dict[Tuple[str, int], List[Tuple[socket.socket, float]]] = {}
+        self._pool_lock = threading.Lock()
+        
+        # Conexiones que está atendiendo el servidor (se cierran al detenerlo)
+        self._client_sockets: Set[socket.socket] = set()
+        self._client_sockets_lock = threading.Lock()
+        
         # Configurar logging
         self.logger = logging.getLogger(f"NetworkManager-Node{node_id}")
         self.logger.setLevel(logging.INFO)
@@ -164,16 +464,70 @@ class NetworkManager:
         if self.server_thread:
             self.server_thread.join(timeout=2.0)
         
+        # Cerrar las conexiones persistentes abiertas: así los clientes ven
+        # el cierre y no reutilizan esas conexiones
+        with self._client_sockets_lock:
+            client_sockets = list(self._client_sockets)
+        for client_socket in client_sockets:
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        
+        self.close_connections()
+        
         self.logger.info("🛑 Servidor detenido")
         print(f"🛑 Servidor del Nodo {self.node_id} detenido")
     
+    def add_periodic_task(self, interval: float, callback: Callable[[], None]) -> None:
+        """
+        Programa una función para que la ejecute el loop del servidor.
+        
+        La espera de accept() se acorta hasta la próxima tarea pendiente,
+        así que no hace falta un thread aparte que solo duerma. Las tareas
+        bloquean la aceptación de conexiones mientras corren: deben ser
+        rápidas y no hacer operaciones de red.
+        
+        Args:
+            interval: Segundos entre ejecuciones (la primera, tras un intervalo)
+            callback: Función sin argumentos
+        """
+        self._periodic_tasks.append([time.monotonic() + interval, interval, callback])
+    
+    def _run_periodic_tasks(self) -> float:
+        """
+        Ejecuta las tareas periódicas que ya vencieron.
+        
+        Returns:
+            Segundos hasta la próxima tarea (como máximo 1.0, el timeout
+            habitual de accept() para poder detener el servidor)
+        """
+        wait = 1.0
+        now = time.monotonic()
+        for task in self._periodic_tasks:
+            if now >= task[0]:
+                try:
+                    task[2]()
+                except Exception as e:
+                    self.logger.error(f"Error en tarea periódica: {e}")
+                now = time.monotonic()
+                task[0] = now + task[1]
+            wait = min(wait, task[0] - now)
+        
+        # settimeout(0) dejaría el socket en modo no bloqueante
+        return max(wait, 0.001)
+    
     def _server_loop(self) -> None:
         """
         Loop principal del servidor.
-        Acepta conexiones y las maneja en threads separados.
+        Acepta conexiones y las maneja en threads separados; entre
+        conexiones ejecuta las tareas periódicas.
         """
         while self.is_running:
             try:
+                if self._periodic_tasks:
+                    self.server_socket.settimeout(self._run_periodic_tasks())
+                
                 # Aceptar conexión (con timeout)
                 client_socket, client_address = self.server_socket.accept()
                 
@@ -196,31 +550,57 @@ class NetworkManager:
         """
         Maneja una conexión de cliente.
         
+        La conexión es persistente: tras responder se espera el siguiente
+        mensaje del mismo cliente, hasta que la cierre o pasen
+        KEEPALIVE_IDLE_SECONDS sin mensajes.
+        
         Args:
             client_socket: Socket del cliente
             client_address: Dirección del cliente
         """
+        with self._client_sockets_lock:
+            self._client_sockets.add(client_socket)
+        
         try:
-            # Recibir mensaje
-            message_data = self._receive_message(client_socket)
-            
-            if message_data:
-                # Parsear mensaje
-                message = NetworkMessage.from_json(message_data)
+            while True:
+                # Recibir mensaje
+                message = self._receive_network_message(
+                    client_socket,
+                    stream_types=self._stream_payload_types
+                )
+                
+                if not message:
+                    break
                 
                 self.logger.info(f"📨 Mensaje recibido de nodo {message.sender}: {message.type}")
                 
                 # Procesar mensaje
                 response = self._process_message(message)
                 
+                # Leer lo que el handler no consumió del payload por partes:
+                # el cliente espera la respuesta después de enviarlo entero
+                if message.payload_chunks is not None:
+                    for _ in message.payload_chunks:
+                        pass
+                
+                # Sin respuesta el cliente no sabría que terminó: cerrar
+                if not response:
+                    break
+                
                 # Enviar respuesta
-                if response:
-                    self._send_message(client_socket, response)
+                self._send_message(client_socket, response)
+                
+                # Esperar el siguiente mensaje por esta misma conexión
+                readable, _, _ = select.select([client_socket], [], [], KEEPALIVE_IDLE_SECONDS)
+                if not readable or not self.is_running:
+                    break
         
         except Exception as e:
             self.logger.error(f"Error manejando cliente {client_address}: {e}")
         
         finally:
+            with self._client_sockets_lock:
+                self._client_sockets.discard(client_socket)
             client_socket.close()
     
     def _process_message(self, message: NetworkMessage) -> Optional[NetworkMessage]:
@@ -283,6 +663,23 @@ class NetworkManager:
         Returns:
             Respuesta del nodo o None si hubo error
         """
+        address = (target_host, target_port)
+        
+        # Reutilizar una conexión libre con ese nodo si la hay. Solo se
+        # reintenta con una conexión nueva si el otro extremo la había
+        # cerrado (el mensaje no llegó a procesarse); tras un timeout o un
+        # error con el mensaje ya enviado no se reintenta, porque el nodo
+        # podría ejecutarlo dos veces (p. ej. DELETE_BLOCK)
+        pooled_socket = self._acquire_connection(address)
+        if pooled_socket is not None:
+            response, retry = self._send_on_pooled_connection(pooled_socket, message)
+            if response is not None:
+                self._release_connection(address, pooled_socket)
+                return response
+            pooled_socket.close()
+            if not retry:
+                return None
+        
         client_socket = None
         try:
             # Crear socket cliente
@@ -290,18 +687,18 @@ class NetworkManager:
             client_socket.settimeout(self.timeout)
             
             # Conectar
-            client_socket.connect((target_host, target_port))
+            client_socket.connect(address)
             
             # Enviar mensaje
             self._send_message(client_socket, message)
             
-            # Recibir respuesta
-            response_data = self._receive_message(client_socket)
-            
-            if response_data:
-                return NetworkMessage.from_json(response_data)
-            
-            return None
+            # Recibir respuesta; si llegó completa, la conexión queda libre
+            # para el siguiente mensaje a este nodo
+            response = self._receive_network_message(client_socket)
+            if response is not None:
+                self._release_connection(address, client_socket)
+                client_socket = None
+            return response
             
         except socket.timeout:
             self.logger.error(f"Timeout conectando a {target_host}:{target_port}")
@@ -313,6 +710,100 @@ class NetworkManager:
             if client_socket:
                 client_socket.close()
     
+    def _send_on_pooled_connection(
+        self,
+        sock: socket.socket,
+        message: NetworkMessage
+    ) -> Tuple[Optional[NetworkMessage], bool]:
+        """
+        Envía un mensaje por una conexión del pool y espera la respuesta.
+        
+        Args:
+            sock: Socket tomado del pool
+            message: Mensaje a enviar
+            
+        Returns:
+            Tupla (respuesta o None, si se puede reintentar con otra
+            conexión). Solo se puede reintentar si el otro extremo había
+            cerrado la conexión: error de conexión al enviar, o cierre antes
+            de recibir ningún byte de la respuesta
+        """
+        try:
+            self._send_message(sock, message)
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            return None, True
+        except Exception as e:
+            self.logger.error(f"Error enviando mensaje por conexión reutilizada: {e}")
+            return None, False
+        
+        try:
+            # Mirar sin consumir si llega algo: 0 bytes es que el otro
+            # extremo cerró sin leer el mensaje
+            if not sock.recv(1, socket.MSG_PEEK):
+                return None, True
+        except (ConnectionResetError, ConnectionAbortedError):
+            return None, True
+        except socket.timeout:
+            self.logger.error(f"Timeout esperando respuesta a {message.type}")
+            return None, False
+        except Exception as e:
+            self.logger.error(f"Error esperando respuesta a {message.type}: {e}")
+            return None, False
+        
+        try:
+            return self._receive_network_message(sock), False
+        except Exception as e:
+            self.logger.error(f"Error recibiendo respuesta a {message.type}: {e}")
+            return None, False
+    
+    def _acquire_connection(self, address: Tuple[str, int]) -> Optional[socket.socket]:
+        """
+        Toma una conexión libre hacia un nodo.
+        
+        Args:
+            address: (ip, puerto) del nodo
+            
+        Returns:
+            Socket conectado, o None si no hay ninguno reutilizable
+        """
+        while True:
+            with self._pool_lock:
+                idle = self._idle_connections.get(address)
+                if not idle:
+                    return None
+                sock, released_at = idle.pop()
+            
+            # Una conexión libre no tiene nada que leer: si select la da por
+            # legible, el otro extremo la cerró (EOF o reset)
+            if (time.monotonic() - released_at <= POOL_IDLE_SECONDS
+                    and not select.select([sock], [], [], 0)[0]):
+                return sock
+            sock.close()
+    
+    def _release_connection(self, address: Tuple[str, int], sock: socket.socket) -> None:
+        """
+        Devuelve una conexión al pool tras un intercambio completo.
+        
+        Args:
+            address: (ip, puerto) del nodo
+            sock: Socket conectado, sin datos pendientes de leer
+        """
+        with self._pool_lock:
+            idle = self._idle_connections.setdefault(address, [])
+            if len(idle) < POOL_MAX_IDLE:
+                idle.append((sock, time.monotonic()))
+                return
+        sock.close()
+    
+    def close_connections(self) -> None:
+        """Cierra todas las conexiones cliente libres."""
+        with self._pool_lock:
+            connections = [s for idle in self._idle_connections.values() for s, _ in idle]
+            self._idle_connections.clear()
+        
+        for sock in connections:
+            sock.close()
+    
     def _send_message(self, sock: socket.socket, message: NetworkMessage) -> None:
         """
         Envía un mensaje a través de un socket.
@@ -320,16 +811,60 @@ class NetworkManager:
         Args:
             sock: Socket donde enviar
             message: Mensaje a enviar
+            
+        Raises:
+            OSError: Si el archivo de payload_file tiene menos bytes de los
+                     anunciados (el receptor vería un mensaje truncado)
         """
         # Convertir mensaje a JSON
-        json_data = message.to_json()
+        json_bytes = message.to_json().encode('utf-8')
         
         # Agregar longitud del mensaje (4 bytes al inicio)
-        message_length = len(json_data.encode('utf-8'))
-        length_prefix = message_length.to_bytes(4, byteorder='big')
+        length_prefix = len(json_bytes).to_bytes(4, byteorder='big')
+        
+        # Enviar: longitud + mensaje (+ payload binario en crudo) en una
+        # sola escritura, sin concatenarlos en otro buffer
+        if message.payload is not None:
+            self._send_buffers(sock, (length_prefix, json_bytes, message.payload))
+        else:
+            self._send_buffers(sock, (length_prefix, json_bytes))
+        
+        if message.payload_file is not None:
+            # Archivo en disco: el kernel lo copia al socket (sendfile)
+            path, size = message.payload_file
+            with open(path, 'rb') as f:
+                sent = sock.sendfile(f, 0, size) if size else 0
+            if sent != size:
+                raise OSError(
+                    f"Payload incompleto desde {path}: {sent} de {size} bytes"
+                )
+    
+    def _send_buffers(self, sock: socket.socket, buffers: Tuple[bytes, ...]) -> None:
+        """
+        Envía varios buffers seguidos con escrituras agrupadas (sendmsg).
+        
+        El kernel recibe todos los buffers en una llamada (writev), en lugar
+        de una llamada por buffer o de copiarlos antes a uno solo. Si la
+        plataforma no tiene sendmsg se envían uno a uno.
+        
+        Args:
+            sock: Socket donde enviar
+            buffers: Buffers a enviar, en orden
+        """
+        if not hasattr(sock, 'sendmsg'):
+            for buffer in buffers:
+                sock.sendall(buffer)
+            return
         
-        # Enviar: longitud + mensaje
-        sock.sendall(length_prefix + json_data.encode('utf-8'))
+        views = [memoryview(buffer).cast('B') for buffer in buffers if len(buffer)]
+        while views:
+            sent = sock.sendmsg(views)
+            # Descartar lo ya enviado (el envío puede ser parcial)
+            while views and sent >= len(views[0]):
+                sent -= len(views[0])
+                views.pop(0)
+            if sent:
+                views[0] = views[0][sent:]
     
     def _receive_message(self, sock: socket.socket) -> Optional[str]:
         """
@@ -343,19 +878,16 @@ class NetworkManager:
         """
         try:
             # Leer longitud del mensaje (4 bytes)
-            length_data = sock.recv(4)
+            length_data = self._receive_exact(sock, 4)
             if not length_data:
                 return None
             
             message_length = int.from_bytes(length_data, byteorder='big')
             
             # Leer mensaje completo
-            message_data = b''
-            while len(message_data) < message_length:
-                chunk = sock.recv(min(4096, message_length - len(message_data)))
-                if not chunk:
-                    return None
-                message_data += chunk
+            message_data = self._receive_exact(sock, message_length)
+            if message_data is None:
+                return None
             
             return message_data.decode('utf-8')
             
@@ -363,6 +895,90 @@ class NetworkManager:
             self.logger.error(f"Error recibiendo mensaje: {e}")
             return None
     
+    def _receive_network_message(
+        self,
+        sock: socket.socket,
+        stream_types: Set[str] = frozenset()
+    ) -> Optional[NetworkMessage]:
+        """
+        Recibe un mensaje completo: JSON y, si lo anuncia, payload binario.
+        
+        Args:
+            sock: Socket desde donde recibir
+            stream_types: Tipos de mensaje cuyo payload no se lee aquí: se
+                          deja en message.payload_chunks para leerlo por partes
+            
+        Returns:
+            NetworkMessage recibido o None
+        """
+        message_data = self._receive_message(sock)
+        if not message_data:
+            return None
+        
+        message = NetworkMessage.from_json(message_data)
+        
+        if message.payload_len and message.type in stream_types:
+            message.payload_chunks = self._iter_payload_chunks(sock, message.payload_len)
+        elif message.payload_len:
+            payload = self._receive_exact(sock, message.payload_len)
+            if payload is None:
+                self.logger.error("Conexión cerrada antes de recibir el payload")
+                return None
+            message.payload = payload
+        
+        return message
+    
+    def _iter_payload_chunks(self, sock: socket.socket, size: int) -> Iterator[memoryview]:
+        """
+        Recibe un payload en partes de hasta PAYLOAD_CHUNK_SIZE bytes.
+        
+        Todas las partes se leen sobre el mismo buffer: cada una es válida
+        solo hasta pedir la siguiente.
+        
+        Args:
+            sock: Socket desde donde recibir
+            size: Tamaño total del payload
+            
+        Yields:
+            Vista de memoria con los bytes recibidos en cada lectura
+            
+        Raises:
+            ConnectionError: Si la conexión se cierra antes de completar
+        """
+        buffer = bytearray(min(PAYLOAD_CHUNK_SIZE, size))
+        view = memoryview(buffer)
+        remaining = size
+        while remaining:
+            n = sock.recv_into(view, min(len(buffer), remaining))
+            if n == 0:
+                raise ConnectionError("Conexión cerrada antes de recibir el payload")
+            remaining -= n
+            yield view[:n]
+    
+    def _receive_exact(self, sock: socket.socket, size: int) -> Optional[bytearray]:
+        """
+        Lee exactamente `size` bytes de un socket.
+        
+        Escribe directamente en un buffer preasignado (recv_into), sin ir
+        concatenando trozos.
+        
+        Args:
+            sock: Socket desde donde recibir
+            size: Número de bytes a leer
+            
+        Returns:
+            Bytes leídos (bytearray), o None si la conexión se cerró antes
+        """
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            n = sock.recv_into(view[received:], size - received)
+            if n == 0:
+                return None
+            received += n
+        return buffer
+    
     # ========================================================================
     # Métodos para transferencia de bloques
     # ========================================================================
@@ -424,15 +1040,58 @@ class NetworkManager:
         response = self.send_message_to_node(target_host, target_port, message)
         return response is not None and response.type == NetworkMessage.PONG
     
-    def register_handler(self, message_type: str, handler: Callable) -> None:
+    def get_node_status(
+        self,
+        target_host: str,
+        target_port: int,
+        compact: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Pide el estado de un nodo (GET_STATUS).
+        
+        Args:
+            target_host: IP del nodo
+            target_port: Puerto del nodo
+            compact: Pedir la respuesta en formato binario compacto (si el
+                     nodo no lo soporta, responde en JSON y se usa tal cual)
+            
+        Returns:
+            Diccionario de estado, o None si el nodo no responde
+        """
+        message = NetworkMessage(
+            NetworkMessage.GET_STATUS,
+            {"compact": True} if compact else {},
+            self.node_id
+        )
+        response = self.send_message_to_node(target_host, target_port, message)
+        if response is None or response.type != NetworkMessage.STATUS_RESPONSE:
+            return None
+        
+        if response.data.get('compact') and response.payload is not None:
+            return NetworkMessage.unpack_status(response.payload)
+        return response.data
+    
+    def register_handler(
+        self,
+        message_type: str,
+        handler: Callable,
+        stream_payload: bool = False
+    ) -> None:
         """
         Registra un handler para un tipo de mensaje.
         
         Args:
             message_type: Tipo de mensaje (usar constantes NetworkMessage)
             handler: Función que maneja el mensaje
+            stream_payload: Si True, el payload no se carga entero en
+                            memoria: el handler lo lee por partes desde
+                            message.payload_chunks
         """
         self.message_handlers[message_type] = handler
+        if stream_payload:
+            self._stream_payload_types.add(message_type)
+        else:
+            self._stream_payload_types.discard(message_type)
         self.logger.info(f"Handler registrado para: {message_type}")
 
 
@@ -479,7 +1138,17 @@ if __name__ == "__main__":
         else:
             print("❌ No se recibió respuesta")
         
-        print("\n5️⃣ Deteniendo servidor...")
+        print("\n5️⃣ Probando formato compacto de estado...")
+        status = {
+            'status': 'online', 'node_id': 1, 'total_blocks': 140,
+            'used_blocks': 12, 'free_blocks': 128, 'usage_percentage': 8.57,
+            'total_files': 2, 'active_nodes': 2, 'nodes_list': [2, 1]
+        }
+        packed = NetworkMessage.pack_status(status)
+        assert NetworkMessage.unpack_status(packed) == status
+        print(f"✅ Estado empaquetado en {len(packed)} bytes y recuperado igual")
+        
+        print("\n6️⃣ Deteniendo servidor...")
         server.stop_server()
         
         print("\n✅ ¡Todas las pruebas pasaron correctamente!")
@@ -14,15 +14,19 @@ Autor: Nerfe5
 Fecha: Noviembre 2025
 """
 
+import os
 import threading
 import time
 import logging
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator, Tuple
 
 from src.config_manager import get_config
 from src.block_manager import BlockManager
-from src.network import NetworkManager, NetworkMessage
+from src.network import (
+    CONTENT_ENCODING_RAW, NetworkManager, NetworkMessage, decompress_chunks,
+    iter_console_commands
+)
 
 
 class Node:
@@ -53,6 +57,12 @@ class Node:
         self.capacidad_mb = node_config['capacidad_mb']
         self.es_coordinador = node_config.get('es_coordinador', False)
         
+        # Parámetros fijos mientras corre el nodo: se leen una vez en lugar
+        # de consultarlos en cada heartbeat o bloque recibido
+        self._capacity_bytes = self.capacidad_mb * 1024 * 1024
+        self._timeout_s = self.config.get_timeout_seconds()
+        self._heartbeat_interval = self.config.get_heartbeat_interval()
+        
         # Configurar logging
         self.logger = logging.getLogger(f"Node{node_id}")
         self.logger.setLevel(logging.INFO)
@@ -60,6 +70,7 @@ class Node:
         # Directorio local para bloques
         self.blocks_dir = self.config.get_blocks_directory()
         self.blocks_dir.mkdir(parents=True, exist_ok=True)
+        self._blocks_dir_str = str(self.blocks_dir)
         
         # Gestor de bloques
         self.block_manager = BlockManager(
@@ -71,17 +82,26 @@ class Node:
             node_id=node_id,
             host=self.node_ip,
             port=self.node_port,
-            timeout=self.config.get_timeout_seconds()
+            timeout=self._timeout_s
         )
         
         # Estado del nodo
         self.bloques_almacenados = 0
         self.bytes_usados = 0
+        self._usage_lock = threading.Lock()
+        
+        # Tamaño de cada bloque local (block_id -> bytes), cargado al
+        # iniciar y mantenido al guardar/eliminar. El disco sigue siendo la
+        # fuente de verdad: si un bloque no está aquí se consulta el archivo
+        self._local_block_sizes: Dict[int, int] = {}
         
         # Control de ejecución
         self.is_running = False
         self.heartbeat_thread: Optional[threading.Thread] = None
         
+        # Despierta al heartbeat al detener (en lugar de esperar al sleep)
+        self._stop_event = threading.Event()
+        
         # Obtener coordinador
         coordinator_config = self.config.get_coordinator_node()
         if coordinator_config:
@@ -91,6 +111,27 @@ class Node:
             self.coordinator_ip = None
             self.coordinator_port = None
         
+        # Heartbeat en anillo: destinos en orden (sucesor directo primero,
+        # después los siguientes por si el sucesor no responde)
+        self._ring_successors = [
+            (node['id'], node['ip'], node['puerto'])
+            for node in self.config.get_ring_successors(node_id)
+        ]
+        
+        # Secuencia propia: arranca en la hora actual (ms) para que tras un
+        # reinicio siga siendo mayor que la última que vio el coordinador
+        self._ring_seq = time.time_ns() // 1_000_000
+        
+        # Última secuencia vista de cada nodo (node_id -> seq); la
+        # actualizan los handlers de red y la lee el thread de heartbeat
+        self._ring_seqs: Dict[int, int] = {}
+        self._ring_lock = threading.Lock()
+        
+        # Respuesta a PING y RING_HEARTBEAT: siempre es la misma y la
+        # devuelven a la vez varios threads, así que no se modifica nunca
+        # (ni data ni timestamp, que queda con la hora de creación)
+        self._pong_message = NetworkMessage(NetworkMessage.PONG, {}, self.node_id)
+        
         # Registrar handlers de red
         self._register_network_handlers()
         
@@ -107,6 +148,10 @@ class Node:
             NetworkMessage.PING,
             self._handle_ping
         )
+        self.network.register_handler(
+            NetworkMessage.RING_HEARTBEAT,
+            self._handle_ring_heartbeat
+        )
         self.network.register_handler(
             NetworkMessage.GET_STATUS,
             self._handle_get_status
@@ -115,7 +160,8 @@ class Node:
         # Handlers de bloques
         self.network.register_handler(
             NetworkMessage.UPLOAD_BLOCK,
-            self._handle_upload_block
+            self._handle_upload_block,
+            stream_payload=True
         )
         self.network.register_handler(
             NetworkMessage.DOWNLOAD_BLOCK,
@@ -154,6 +200,7 @@ class Node:
         # Iniciar thread de heartbeat (si no es coordinador)
         if not self.es_coordinador and self.coordinator_ip:
             self.is_running = True
+            self._stop_event.clear()
             self.heartbeat_thread = threading.Thread(
                 target=self._heartbeat_loop,
                 daemon=True
@@ -175,6 +222,7 @@ class Node:
         print(f"\n🛑 Deteniendo nodo {self.node_id}...")
         
         self.is_running = False
+        self._stop_event.set()
         
         if self.heartbeat_thread:
             self.heartbeat_thread.join(timeout=2.0)
@@ -189,28 +237,62 @@ class Node:
     # ========================================================================
     
     def _heartbeat_loop(self) -> None:
-        """Loop de heartbeat hacia el coordinador."""
-        interval = self.config.get_heartbeat_interval()
-        
+        """Loop de heartbeat en anillo (llega al coordinador por el anillo)."""
         while self.is_running:
             self._send_heartbeat()
-            time.sleep(interval)
+            if self._stop_event.wait(self._heartbeat_interval):
+                break
     
     def _send_heartbeat(self) -> None:
-        """Envía heartbeat al coordinador."""
-        if not self.coordinator_ip or not self.coordinator_port:
+        """
+        Envía un RING_HEARTBEAT al sucesor en el anillo.
+        
+        El mensaje lleva la secuencia propia (incrementada) y las últimas
+        secuencias recibidas del predecesor, de modo que cada nodo envía
+        un único mensaje por intervalo. Si el sucesor no responde se prueba
+        el siguiente del anillo, que así se salta los nodos caídos.
+        """
+        if not self._ring_successors:
             return
         
-        # Hacer ping al coordinador
-        success = self.network.ping_node(self.coordinator_ip, self.coordinator_port)
+        self._ring_seq += 1
+        with self._ring_lock:
+            self._ring_seqs[self.node_id] = self._ring_seq
+            seqs = list(self._ring_seqs.items())
+        
+        message = NetworkMessage(
+            NetworkMessage.RING_HEARTBEAT,
+            {'seqs': seqs},
+            self.node_id
+        )
+        
+        for node_id, ip, puerto in self._ring_successors:
+            response = self.network.send_message_to_node(ip, puerto, message)
+            if response is not None and response.type == NetworkMessage.PONG:
+                return
+            self.logger.warning(f"⚠️ Nodo {node_id} del anillo no responde al heartbeat")
         
-        if not success:
-            self.logger.warning("⚠️ No se pudo contactar al coordinador")
+        self.logger.warning("⚠️ No se pudo contactar a ningún nodo del anillo")
     
     # ========================================================================
     # Gestión de bloques locales
     # ========================================================================
     
+    def _block_path(self, block_id: int) -> str:
+        """
+        Retorna la ruta del archivo de un bloque local.
+        
+        Se arma sobre la ruta del directorio ya convertida a str, sin crear
+        objetos Path en cada operación de bloque.
+        
+        Args:
+            block_id: ID del bloque
+            
+        Returns:
+            Ruta del archivo block_XXXXXX.bin
+        """
+        return f"{self._blocks_dir_str}/block_{block_id:06d}.bin"
+    
     def store_block(self, block_id: int, block_data: bytes, file_name: str) -> bool:
         """
         Almacena un bloque localmente.
@@ -230,15 +312,14 @@ class Node:
                 return False
             
             # Nombre del archivo de bloque
-            block_filename = f"block_{block_id:06d}.bin"
-            block_path = self.blocks_dir / block_filename
+            block_path = self._block_path(block_id)
             
             # Guardar bloque
-            self.block_manager.write_block(str(block_path), block_data)
+            self.block_manager.write_block(block_path, block_data)
+            self._local_block_sizes[block_id] = len(block_data)
             
             # Actualizar estadísticas
-            self.bloques_almacenados += 1
-            self.bytes_usados += len(block_data)
+            self._update_usage(1, len(block_data))
             
             self.logger.info(f"✅ Bloque {block_id} almacenado ({len(block_data)} bytes)")
             return True
@@ -247,6 +328,49 @@ class Node:
             self.logger.error(f"❌ Error almacenando bloque {block_id}: {e}")
             return False
     
+    def store_block_stream(
+        self,
+        block_id: int,
+        chunks: Iterator[memoryview],
+        block_size: int,
+        block_hash: str
+    ) -> Tuple[bool, bool]:
+        """
+        Almacena un bloque que llega por partes, verificando su hash.
+        
+        El bloque se escribe a disco a medida que se recibe; no se carga
+        entero en memoria.
+        
+        Args:
+            block_id: ID del bloque
+            chunks: Partes del bloque (message.payload_chunks, ya
+                    descomprimidas)
+            block_size: Tamaño anunciado del bloque (para verificar espacio)
+            block_hash: Hash esperado
+            
+        Returns:
+            (hash_ok, almacenado): hash_ok es False solo si el hash no coincide
+        """
+        try:
+            if not self._has_space_for_block(block_size):
+                self.logger.error("❌ No hay espacio suficiente")
+                return True, False
+            
+            block_path = self._block_path(block_id)
+            block_size = self.block_manager.write_block_stream(block_path, chunks, block_hash)
+            if block_size is None:
+                return False, False
+            
+            self._local_block_sizes[block_id] = block_size
+            self._update_usage(1, block_size)
+            
+            self.logger.info(f"✅ Bloque {block_id} almacenado ({block_size} bytes)")
+            return True, True
+            
+        except Exception as e:
+            self.logger.error(f"❌ Error almacenando bloque {block_id}: {e}")
+            return True, False
+    
     def retrieve_block(self, block_id: int) -> Optional[bytes]:
         """
         Recupera un bloque local.
@@ -258,14 +382,13 @@ class Node:
             Datos del bloque o None si no existe
         """
         try:
-            block_filename = f"block_{block_id:06d}.bin"
-            block_path = self.blocks_dir / block_filename
+            block_path = self._block_path(block_id)
             
-            if not block_path.exists():
+            if block_id not in self._local_block_sizes and not os.path.exists(block_path):
                 self.logger.warning(f"⚠️ Bloque {block_id} no encontrado")
                 return None
             
-            block_data = self.block_manager.read_block(str(block_path))
+            block_data = self.block_manager.read_block(block_path)
             self.logger.info(f"✅ Bloque {block_id} recuperado ({len(block_data)} bytes)")
             return block_data
             
@@ -284,20 +407,21 @@ class Node:
             True si se eliminó correctamente
         """
         try:
-            block_filename = f"block_{block_id:06d}.bin"
-            block_path = self.blocks_dir / block_filename
-            
-            if not block_path.exists():
-                self.logger.warning(f"⚠️ Bloque {block_id} no existe")
-                return False
+            block_path = self._block_path(block_id)
             
-            # Obtener tamaño antes de eliminar
-            block_size = block_path.stat().st_size
+            # Obtener tamaño antes de eliminar (del registro local o, si no
+            # está, del disco)
+            block_size = self._local_block_sizes.pop(block_id, None)
+            if block_size is None:
+                try:
+                    block_size = os.stat(block_path).st_size
+                except FileNotFoundError:
+                    self.logger.warning(f"⚠️ Bloque {block_id} no existe")
+                    return False
             
             # Eliminar
-            if self.block_manager.delete_block(str(block_path)):
-                self.bloques_almacenados -= 1
-                self.bytes_usados -= block_size
+            if self.block_manager.delete_block(block_path):
+                self._update_usage(-1, -block_size)
                 self.logger.info(f"✅ Bloque {block_id} eliminado")
                 return True
             
@@ -311,11 +435,33 @@ class Node:
         """Calcula el espacio usado actualmente."""
         self.bloques_almacenados = 0
         self.bytes_usados = 0
+        self._local_block_sizes.clear()
         
         if self.blocks_dir.exists():
             for block_file in self.blocks_dir.glob("block_*.bin"):
+                block_size = block_file.stat().st_size
                 self.bloques_almacenados += 1
-                self.bytes_usados += block_file.stat().st_size
+                self.bytes_usados += block_size
+                
+                # block_000042.bin -> 42
+                block_id = block_file.stem[len("block_"):]
+                if block_id.isdigit():
+                    self._local_block_sizes[int(block_id)] = block_size
+    
+    def _update_usage(self, blocks_delta: int, bytes_delta: int) -> None:
+        """
+        Actualiza los contadores de uso local.
+        
+        Los handlers de red corren en threads distintos y `+=` sobre un
+        atributo no es atómico; el lock solo cubre la suma.
+        
+        Args:
+            blocks_delta: Cambio en el número de bloques
+            bytes_delta: Cambio en bytes usados
+        """
+        with self._usage_lock:
+            self.bloques_almacenados += blocks_delta
+            self.bytes_usados += bytes_delta
     
     def _has_space_for_block(self, block_size: int) -> bool:
         """
@@ -327,8 +473,7 @@ class Node:
         Returns:
             True si hay espacio
         """
-        capacity_bytes = self.capacidad_mb * 1024 * 1024
-        return (self.bytes_usados + block_size) <= capacity_bytes
+        return self.bytes_usados + block_size <= self._capacity_bytes
     
     # ========================================================================
     # Handlers de red
@@ -336,20 +481,39 @@ class Node:
     
     def _handle_ping(self, message: NetworkMessage) -> NetworkMessage:
         """Handler para mensajes PING."""
-        return NetworkMessage(NetworkMessage.PONG, {}, self.node_id)
+        return self._pong_message
+    
+    def _handle_ring_heartbeat(self, message: NetworkMessage) -> NetworkMessage:
+        """
+        Handler para RING_HEARTBEAT del predecesor en el anillo.
+        
+        Guarda la mayor secuencia vista de cada nodo para reenviarla en el
+        próximo heartbeat propio (la entrada de este nodo no se toca).
+        """
+        with self._ring_lock:
+            for node_id, seq in message.data.get('seqs', ()):
+                if node_id != self.node_id and seq > self._ring_seqs.get(node_id, 0):
+                    self._ring_seqs[node_id] = seq
+        
+        return self._pong_message
     
     def _handle_get_status(self, message: NetworkMessage) -> NetworkMessage:
         """Handler para solicitud de estado."""
-        capacity_bytes = self.capacidad_mb * 1024 * 1024
-        usage_percentage = (self.bytes_usados / capacity_bytes * 100) if capacity_bytes > 0 else 0
+        capacity_bytes = self._capacity_bytes
+        
+        # Lectura consistente de ambos contadores
+        with self._usage_lock:
+            bloques_almacenados = self.bloques_almacenados
+            bytes_usados = self.bytes_usados
+        usage_percentage = (bytes_usados / capacity_bytes * 100) if capacity_bytes > 0 else 0
         
         status = {
             'status': 'online',
             'node_id': self.node_id,
             'role': 'coordinator' if self.es_coordinador else 'worker',
-            'blocks_stored': self.bloques_almacenados,
-            'bytes_used': self.bytes_usados,
-            'bytes_available': capacity_bytes - self.bytes_usados,
+            'blocks_stored': bloques_almacenados,
+            'bytes_used': bytes_usados,
+            'bytes_available': capacity_bytes - bytes_usados,
             'capacity_mb': self.capacidad_mb,
             'usage_percentage': usage_percentage
         }
@@ -367,18 +531,35 @@ class Node:
         """
         block_id = message.data.get('block_id')
         file_name = message.data.get('file_name')
-        block_data_hex = message.data.get('data')
         block_hash = message.data.get('hash')
         
         self.logger.info(f"📥 Solicitud de subida: bloque {block_id} de {file_name}")
         
         try:
-            # Convertir datos de hex a bytes
-            block_data = bytes.fromhex(block_data_hex)
+            if message.payload_chunks is not None:
+                # Payload recibido por partes: se escribe a disco y se
+                # calcula el hash a medida que llega (descomprimido si el
+                # emisor lo envió comprimido; el hash es del bloque original)
+                chunks = message.payload_chunks
+                encoding = message.data.get('content_encoding', CONTENT_ENCODING_RAW)
+                if encoding != CONTENT_ENCODING_RAW:
+                    chunks = decompress_chunks(chunks, encoding)
+                hash_ok, stored = self.store_block_stream(
+                    block_id, chunks, message.data.get('size', message.payload_len), block_hash
+                )
+            else:
+                # Datos del bloque: payload binario (o hex en el JSON, formato
+                # de clientes anteriores)
+                if message.payload is not None:
+                    block_data = message.payload
+                else:
+                    block_data = bytes.fromhex(message.data.get('data'))
+                
+                # Verificar hash
+                hash_ok = self.block_manager._calculate_hash(block_data) == block_hash
+                stored = hash_ok and self.store_block(block_id, block_data, file_name)
             
-            # Verificar hash
-            calculated_hash = self.block_manager._calculate_hash(block_data)
-            if calculated_hash != block_hash:
+            if not hash_ok:
                 self.logger.error(f"❌ Hash no coincide para bloque {block_id}")
                 return NetworkMessage(
                     NetworkMessage.ERROR,
@@ -386,8 +567,7 @@ class Node:
                     self.node_id
                 )
             
-            # Almacenar bloque
-            if self.store_block(block_id, block_data, file_name):
+            if stored:
                 response_data = {
                     'success': True,
                     'block_id': block_id,
@@ -423,20 +603,30 @@ class Node:
         self.logger.info(f"📤 Solicitud de descarga: bloque {block_id}")
         
         try:
-            # Recuperar bloque
-            block_data = self.retrieve_block(block_id)
+            # Solo se consulta el tamaño: el archivo se envía con sendfile
+            # directamente desde disco, sin leerlo a memoria
+            block_path = self._block_path(block_id)
+            block_size = self._local_block_sizes.get(block_id)
+            if block_size is None:
+                try:
+                    block_size = os.stat(block_path).st_size
+                except FileNotFoundError:
+                    block_size = 0
+                    self.logger.warning(f"⚠️ Bloque {block_id} no encontrado")
             
-            if block_data:
+            if block_size:
                 response_data = {
                     'success': True,
                     'block_id': block_id,
-                    'data': block_data.hex(),  # Convertir a hex para JSON
-                    'size': len(block_data)
+                    'size': block_size
                 }
+                self.logger.info(f"✅ Bloque {block_id} recuperado ({block_size} bytes)")
+                # Los datos viajan como payload binario tras el JSON
                 return NetworkMessage(
                     NetworkMessage.STATUS_RESPONSE,
                     response_data,
-                    self.node_id
+                    self.node_id,
+                    payload_file=(block_path, block_size)
                 )
             else:
                 return NetworkMessage(
@@ -477,7 +667,7 @@ class Node:
     
     def _print_status(self) -> None:
         """Imprime el estado del nodo."""
-        capacity_bytes = self.capacidad_mb * 1024 * 1024
+        capacity_bytes = self._capacity_bytes
         available_bytes = capacity_bytes - self.bytes_usados
         usage_percentage = (self.bytes_usados / capacity_bytes * 100) if capacity_bytes > 0 else 0
         
@@ -508,9 +698,7 @@ class Node:
         print()
         
         try:
-            while True:
-                cmd = input(f"node{self.node_id}> ").strip().lower()
-                
+            for cmd in iter_console_commands(f"node{self.node_id}> ", lambda: self.is_running):
                 if cmd == 'quit' or cmd == 'exit':
                     break
                 elif cmd == 'status':
@@ -555,10 +743,20 @@ class Node:
         
         print(f"\n🔍 Haciendo ping a coordinador ({self.coordinator_ip}:{self.coordinator_port})...")
         
-        if self.network.ping_node(self.coordinator_ip, self.coordinator_port):
-            print("✅ Coordinador responde\n")
-        else:
+        if not self.network.ping_node(self.coordinator_ip, self.coordinator_port):
             print("❌ Coordinador no responde\n")
+            return
+        
+        print("✅ Coordinador responde")
+        
+        # Resumen del sistema (respuesta de estado en formato compacto)
+        status = self.network.get_node_status(self.coordinator_ip, self.coordinator_port)
+        if status and 'total_blocks' in status:
+            print(f"   Nodos activos: {status['active_nodes']}    |    "
+                  f"Bloques usados: {status['used_blocks']}/{status['total_blocks']} "
+                  f"({status['usage_percentage']:.1f}%)    |    "
+                  f"Archivos: {status['total_files']}")
+        print()
 
 
 # ============================================================================